@@ -1,52 +1,373 @@
 import os
+import json
+import math
+import time
 import logging
-from flask import Flask, render_template, request, jsonify
+from datetime import timezone
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, send_file, stream_with_context
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "mlbb_fuzzy_secret")
-
-# Configure database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from database import db
+from models import Hero, HeroStrength, HeroWeakness, UserPreference, HERO_PROJECTIONS, project_hero
+from fuzzy_logic import (evaluate_hero, get_hero_recommendations, score_matrix, quantize_preferences,
+                         PREFERENCE_ATTRIBUTES, IMPORTANCE_KEYS, DEFAULT_IMPORTANCE)
+from score_cache import response_cache
+import cache_backends
+import scoring_pool
+from hero_bulk import FORMATS, read_records, write_records
+from database_manager import create_initial_data
+from hero_catalog import get_catalog, refresh_catalog
+import profile_rankings
+import request_metrics
+import request_profiler
+from log_config import configure_logging
 
-# Debug the database URL
-logger.info(f"Database URL configured: {app.config['SQLALCHEMY_DATABASE_URI']}")
+# Routes, registered on the app by create_app; CLI commands go on the top level
+bp = Blueprint("hero_selector", __name__, cli_group=None)
 
-# Import these after app config to avoid circular imports
-from database import db
-from models import Hero, HeroStrength, HeroWeakness, UserPreference
-from fuzzy_logic import evaluate_hero, get_hero_recommendations
+# Create the schema and seed the heroes whenever an app is created, instead
+# of once with ``flask --app main init-db``; convenient for local development
+INIT_DB_ON_STARTUP = os.environ.get("INIT_DB_ON_STARTUP", "0") == "1"
 
-# Initialize the app with extensions
-db.init_app(app)
+def create_app(config=None):
+    """
+    Create and configure the Flask application.
+    
+    Nothing here touches the database or builds the fuzzy control system, so
+    creating an app is cheap; the schema and seed data come from the
+    ``init-db`` command, and the scoring engine loads on first use or in
+    ``warm_up``.
+    
+    Args:
+        config (dict, optional): Settings overriding the environment defaults.
+        
+    Returns:
+        Flask: The application.
+    """
+    started = time.perf_counter()
+    configure_logging()
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "mlbb_fuzzy_secret")
+    
+    # Configure database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    if config:
+        app.config.update(config)
+    
+    # Debug the database URL
+    logger.info("Database URL configured: %s", app.config['SQLALCHEMY_DATABASE_URI'])
+    
+    # Initialize the app with extensions
+    db.init_app(app)
+    request_metrics.init_app(app)
+    request_profiler.init_app(app)
+    app.register_blueprint(bp)
+    
+    if INIT_DB_ON_STARTUP:
+        with app.app_context():
+            init_db()
+    
+    logger.info("Application created in %.1f ms", (time.perf_counter() - started) * 1000)
+    return app
 
-# Create database tables if they don't exist
-with app.app_context():
+def init_db():
+    """Create missing tables and seed the initial heroes; safe to run more than once."""
     db.create_all()
+    create_initial_data()
+
+@bp.cli.command("init-db")
+def init_db_command():
+    """Create the database schema and seed the initial heroes."""
+    started = time.perf_counter()
+    init_db()
+    print(f"Database initialized in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+def warm_up(app):
+    """
+    Load everything scoring needs ahead of the first request.
     
-    # Import database manager here to avoid circular imports
-    from database_manager import create_initial_data, get_hero_by_id, get_heroes_by_role, get_all_heroes, get_all_roles
+    Builds the fuzzy control system, batch engine and suitability table, and
+    loads the hero catalog with its scored store. Run in a gunicorn master
+    with ``preload_app``, so forked workers share the result copy-on-write.
     
-    # Populate database with initial data if it's empty
-    create_initial_data()
+    Args:
+        app (Flask): Application providing the database context.
+        
+    Returns:
+        float: Seconds spent.
+    """
+    from fuzzy_logic import get_suitability_table
+    
+    started = time.perf_counter()
+    get_suitability_table()
+    with app.app_context():
+        get_catalog().store
+    elapsed = time.perf_counter() - started
+    logger.info("Scoring engine and hero catalog loaded in %.1f ms", elapsed * 1000)
+    return elapsed
+
+def init_worker(app):
+    """
+    Prepare a process forked from a warmed-up master.
+    
+    Drops the database connections inherited from the master without closing
+    them, since the master still owns them, the cache backends' Redis
+    connections, which ``warm_up`` may have opened, and any scoring pool, whose
+    manager thread stayed behind in the master.
+    
+    Args:
+        app (Flask): The preloaded application.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    cache_backends.reset_connections()
+    scoring_pool.shutdown()
+
+@bp.before_app_request
+def start_background_work():
+    """Keep saved profile rankings up to date, from the first request a process serves."""
+    profile_rankings.start_worker(current_app._get_current_object())
+
+# Preference match modes: the five basic attributes, or every importance-weighted one
+SCORING_MODES = ("basic", "weighted")
+
+# Heroes returned by /api/heroes/similar unless k is given
+DEFAULT_SIMILAR_COUNT = 5
+
+# Limits and streaming cutoff for batch evaluation
+MAX_BATCH_PROFILES = 1000
+BATCH_STREAM_THRESHOLD = 5000
+
+def parse_number(source, key, default):
+    """
+    Read a finite number from a form, query string or JSON object.
+    
+    Args:
+        source (Mapping): Values keyed by name.
+        key (str): Name of the value.
+        default (float): Value when ``key`` is missing.
+        
+    Returns:
+        float: The value.
+        
+    Raises:
+        ValueError: If the value is not a finite number.
+    """
+    try:
+        value = float(source.get(key, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{key} must be a finite number")
+    return value
+
+def parse_preferences(source):
+    """
+    Read the preference sliders from a form, query string or JSON object.
+    
+    With ``scoring=weighted`` the ``*_importance`` weights (0-10, named as the
+    UserPreference columns) are read too, and every additional attribute and
+    statistic counts towards the preference match.
+    
+    Args:
+        source (Mapping): Values keyed by attribute name; missing ones default to 5.
+        
+    Returns:
+        dict: Preference values as floats.
+        
+    Raises:
+        ValueError: If a value is not a finite number, an importance is out
+            of range or the scoring mode is unknown.
+    """
+    preferences = {attr: parse_number(source, attr, 5) for attr in PREFERENCE_ATTRIBUTES}
+    scoring = source.get("scoring") or "basic"
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of: {', '.join(SCORING_MODES)}")
+    if scoring == "weighted":
+        for key in IMPORTANCE_KEYS:
+            importance = parse_number(source, key, DEFAULT_IMPORTANCE)
+            if not 0 <= importance <= 10:
+                raise ValueError(f"{key} must be between 0 and 10")
+            preferences[key] = importance
+    return preferences
+
+def parse_top_k(value):
+    """
+    Read an optional ``top_k`` limit.
+    
+    Args:
+        value (str): Raw value; empty or missing means no limit.
+        
+    Returns:
+        int: The limit, or None for all heroes.
+        
+    Raises:
+        ValueError: If the value is not a non-negative integer.
+    """
+    if value in (None, ""):
+        return None
+    top_k = int(value)
+    if top_k < 0:
+        raise ValueError("top_k must not be negative")
+    return top_k
 
-@app.route("/")
+def parse_page_args(source):
+    """
+    Read the optional keyset pagination parameters ``cursor`` and ``limit``.
+    
+    Args:
+        source (dict): Request arguments.
+        
+    Returns:
+        tuple: (cursor hero ID or None, page size or None).
+        
+    Raises:
+        ValueError: If either value is not a valid integer in range.
+    """
+    from database_manager import MAX_PAGE_SIZE
+    
+    cursor = source.get("cursor")
+    cursor = int(cursor) if cursor not in (None, "") else None
+    limit = source.get("limit")
+    limit = int(limit) if limit not in (None, "") else None
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return cursor, limit
+
+def parse_projection(value):
+    """
+    Read the optional ``fields`` projection name.
+    
+    Args:
+        value (str): Raw value; empty or missing means ``full``.
+        
+    Returns:
+        str: Key of ``HERO_PROJECTIONS``.
+        
+    Raises:
+        ValueError: If the projection is unknown.
+    """
+    if value in (None, ""):
+        return "full"
+    if value not in HERO_PROJECTIONS:
+        raise ValueError(f"fields must be one of: {', '.join(HERO_PROJECTIONS)}")
+    return value
+
+def preference_key(preferences):
+    """Quantized preference values and importance weights in a fixed order, for cache keys."""
+    return tuple(sorted(preferences.items()))
+
+def cached_payload(key, compute):
+    """
+    Get an evaluation payload from the response cache, computing it on a miss.
+    
+    Args:
+        key (tuple): Key from ``ResponseCache.make_key``.
+        compute (callable): Builds the payload; failed evaluations are not cached.
+        
+    Returns:
+        The payload.
+    """
+    payload = response_cache.get(key)
+    if payload is None:
+        payload = compute()
+        if not (isinstance(payload, dict) and "error" in payload):
+            response_cache.set(key, payload)
+    return payload
+
+def response_validators(key, last_modified):
+    """
+    Get the validators of a cached JSON payload.
+    
+    Args:
+        key (tuple): Key from ``ResponseCache.make_key``.
+        last_modified (datetime): When the catalog or rule base last changed, naive UTC, or None.
+        
+    Returns:
+        tuple: (ETag, Last-Modified as an aware UTC datetime or None).
+    """
+    if last_modified is not None:
+        # HTTP dates have one-second resolution
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return response_cache.etag(key), last_modified
+
+def is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """
+    Decide whether a conditional GET can be answered with 304.
+    
+    Args:
+        etag (str): Current ETag, from ``response_validators``.
+        last_modified (datetime): Current Last-Modified, from ``response_validators``.
+        if_none_match (str): Raw ``If-None-Match`` header, or None.
+        if_modified_since (str): Raw ``If-Modified-Since`` header, or None.
+        
+    Returns:
+        bool: True if the client's copy is still current.
+    """
+    # If-None-Match takes precedence over If-Modified-Since
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    since = parse_date(if_modified_since)
+    return last_modified is not None and since is not None and last_modified <= since
+
+def validator_headers(etag, last_modified):
+    """
+    Format the headers sent with every conditional JSON response.
+    
+    Returns:
+        list: (name, value) pairs.
+    """
+    headers = [("ETag", quote_etag(etag))]
+    if last_modified is not None:
+        headers.append(("Last-Modified", http_date(last_modified)))
+    # Clients may keep the response but must revalidate, since the catalog can change
+    headers.append(("Cache-Control", "no-cache"))
+    return headers
+
+def conditional_json(key, last_modified, compute):
+    """
+    Serve a cached JSON payload with ETag and Last-Modified validators.
+    
+    Conditional GETs that still match are answered with 304 before anything
+    is looked up or computed.
+    
+    Args:
+        key (tuple): Key from ``ResponseCache.make_key``.
+        last_modified (datetime): When the catalog or rule base last changed, naive UTC, or None.
+        compute (callable): Builds the payload on a cache miss.
+        
+    Returns:
+        Response: 200 with the payload, or 304.
+    """
+    etag, last_modified = response_validators(key, last_modified)
+    if is_not_modified(etag, last_modified, request.headers.get("If-None-Match"),
+                       request.headers.get("If-Modified-Since")):
+        response = Response(status=304)
+    else:
+        response = jsonify(cached_payload(key, compute))
+    for name, value in validator_headers(etag, last_modified):
+        response.headers[name] = value
+    return response
+
+@bp.route("/")
 def index():
     """Render the main page with hero selection form"""
-    roles = get_all_roles()
-    heroes = get_all_heroes()
-    return render_template("index.html", roles=roles, heroes=heroes)
+    catalog = get_catalog()
+    return render_template("index.html", roles=catalog.roles, heroes=catalog.heroes)
 
-@app.route("/admin")
+@bp.route("/metrics")
+def metrics():
+    """Prometheus metrics of this process"""
+    return Response(request_metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@bp.route("/admin")
 def admin():
     """Render the admin page for managing the hero database"""
     from database_manager import get_all_heroes
@@ -65,27 +386,51 @@ def admin():
         message_type=message_type
     )
 
-@app.route("/evaluate", methods=["POST"])
+@bp.route("/admin/profiles")
+def admin_profiles():
+    """List the stored request profiles, newest first"""
+    if not request_profiler.ENABLED:
+        return jsonify({"error": "Request profiling is disabled"}), 404
+    return jsonify({"profile_dir": request_profiler.PROFILE_DIR, "profiles": request_profiler.list_profiles()})
+
+@bp.route("/admin/profiles/<name>")
+def admin_download_profile(name):
+    """Download a stored request profile as pstats data, or as a report with format=text"""
+    if not request_profiler.ENABLED:
+        return jsonify({"error": "Request profiling is disabled"}), 404
+    path = request_profiler.profile_path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "text":
+        sort = request.args.get("sort", "cumulative")
+        try:
+            report = request_profiler.profile_text(path, sort=sort)
+        except KeyError:
+            return jsonify({"error": f"Invalid sort key: {sort}"}), 400
+        return Response(report, mimetype="text/plain")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=name + ".prof")
+
+@bp.route("/evaluate", methods=["POST"])
 def evaluate():
     """Process form data and evaluate hero using fuzzy logic"""
+    catalog = None
     try:
+        catalog = get_catalog()
+        
         # Get form data
         hero_id = request.form.get("hero_id")
         
         # Get attributes from form
-        preferences = {
-            "damage": float(request.form.get("damage", 5)),
-            "durability": float(request.form.get("durability", 5)),
-            "crowd_control": float(request.form.get("crowd_control", 5)),
-            "mobility": float(request.form.get("mobility", 5)),
-            "difficulty": float(request.form.get("difficulty", 5))
-        }
+        preferences = quantize_preferences(parse_preferences(request.form))
         
         # Evaluate single hero if selected
         if hero_id:
-            hero = get_hero_by_id(hero_id)
+            hero = catalog.get_hero(hero_id)
             if hero:
-                result = evaluate_hero(hero, preferences)
+                key = response_cache.make_key("hero", hero["id"], preference_key(preferences), catalog.tag)
+                result = cached_payload(key, lambda: evaluate_hero(
+                    hero, preferences, catalog.store.get_suitability(hero_id)))
                 return render_template("results.html", 
                                       single_hero=hero, 
                                       evaluation=result)
@@ -93,8 +438,10 @@ def evaluate():
         # Get role-based recommendations
         role = request.form.get("role")
         if role:
-            heroes = get_heroes_by_role(role)
-            recommendations = get_hero_recommendations(heroes, preferences)
+            heroes = catalog.store.for_role(role)
+            top_k = parse_top_k(request.form.get("top_k"))
+            key = response_cache.make_key("role", role, preference_key(preferences), catalog.tag, top_k)
+            recommendations = cached_payload(key, lambda: get_hero_recommendations(heroes, preferences, top_k=top_k))
             return render_template("results.html", 
                                   recommendations=recommendations, 
                                   role=role,
@@ -103,62 +450,212 @@ def evaluate():
         # Default case if neither hero nor role is specified
         return render_template("index.html", 
                              error="Please select a hero or role for evaluation",
-                             roles=get_all_roles(),
-                             heroes=get_all_heroes())
+                             roles=catalog.roles,
+                             heroes=catalog.heroes)
     
     except Exception as e:
-        logging.error(f"Error in evaluate: {str(e)}")
+        logger.error("Error in evaluate: %s", e)
         return render_template("index.html", 
                              error=f"An error occurred: {str(e)}",
-                             roles=get_all_roles(),
-                             heroes=get_all_heroes())
+                             roles=catalog.roles if catalog is not None else [],
+                             heroes=catalog.heroes if catalog is not None else [])
 
-@app.route("/api/heroes")
+@bp.route("/api/heroes")
 def api_heroes():
-    """API endpoint to get heroes by role"""
+    """API endpoint to get heroes by role, optionally paginated or streamed as NDJSON"""
     role = request.args.get("role")
-    if role:
-        heroes = get_heroes_by_role(role)
-        return jsonify(heroes)
-    return jsonify(get_all_heroes())
+    fmt = request.args.get("format", "json")
+    if fmt not in ("json", "ndjson"):
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    try:
+        cursor, limit = parse_page_args(request.args)
+        projection = parse_projection(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if fmt == "ndjson":
+        # Rows go straight from the database cursor to the client
+        from database_manager import iter_heroes
+        heroes = iter_heroes(role=role, after_id=cursor, limit=limit, projection=projection)
+        return Response(stream_with_context(write_records(heroes, "ndjson")), mimetype="application/x-ndjson")
+    
+    if cursor is not None or limit is not None:
+        from database_manager import get_heroes_page, DEFAULT_PAGE_SIZE
+        heroes, next_cursor = get_heroes_page(cursor, limit or DEFAULT_PAGE_SIZE, role, projection)
+        return jsonify({"heroes": heroes, "next_cursor": next_cursor})
+    
+    catalog = get_catalog()
+    heroes = catalog.get_heroes_by_role(role) if role else catalog.heroes
+    return jsonify([project_hero(hero, projection) for hero in heroes])
 
-@app.route("/api/evaluate_hero/<hero_id>")
+@bp.route("/api/heroes/similar")
+def api_similar_heroes():
+    """API endpoint to find the heroes nearest to a hero, or to the preference sliders"""
+    from hero_index import get_hero_index
+    
+    role = request.args.get("role")
+    try:
+        k = parse_top_k(request.args.get("k"))
+        projection = parse_projection(request.args.get("fields"))
+        hero_id = request.args.get("hero_id")
+        hero_id = int(hero_id) if hero_id else None
+        preferences = parse_preferences(request.args) if hero_id is None else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if k is None:
+        k = DEFAULT_SIMILAR_COUNT
+    
+    index = get_hero_index()
+    if hero_id is not None:
+        result = index.similar(hero_id, k, role)
+        if result is None:
+            return jsonify({"error": "Hero not found"}), 404
+        hero, similar = result
+        return jsonify({
+            "hero": project_hero(hero, projection),
+            "similar": [{"hero": project_hero(hero, projection), "distance": round(distance, 4)}
+                        for distance, hero in similar]
+        })
+    
+    # Closest to the sliders, ranked by preference match without running inference
+    return jsonify({
+        "preferences": preferences,
+        "heroes": [{"hero": project_hero(hero, projection), "preference_match": round(match, 2)}
+                   for match, hero in index.nearest(preferences, k, role)]
+    })
+
+@bp.route("/api/evaluate_hero/<hero_id>")
 def api_evaluate_hero(hero_id):
     """API endpoint to evaluate a specific hero"""
     try:
-        hero = get_hero_by_id(hero_id)
+        catalog = get_catalog()
+        hero = catalog.get_hero(hero_id)
         if not hero:
             return jsonify({"error": "Hero not found"}), 404
         
         # Get preference parameters
-        preferences = {
-            "damage": float(request.args.get("damage", 5)),
-            "durability": float(request.args.get("durability", 5)),
-            "crowd_control": float(request.args.get("crowd_control", 5)),
-            "mobility": float(request.args.get("mobility", 5)),
-            "difficulty": float(request.args.get("difficulty", 5))
-        }
+        preferences = quantize_preferences(parse_preferences(request.args))
         
-        result = evaluate_hero(hero, preferences)
-        return jsonify(result)
+        key = response_cache.make_key("hero", hero["id"], preference_key(preferences), catalog.tag)
+        return conditional_json(key, catalog.last_modified, lambda: evaluate_hero(
+            hero, preferences, catalog.store.get_suitability(hero_id)))
     
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.route("/api/recommendations")
+def api_recommendations():
+    """API endpoint to get the best heroes for a role"""
+    role = request.args.get("role")
+    if not role:
+        return jsonify({"error": "Missing required parameter: role"}), 400
+    try:
+        preferences = quantize_preferences(parse_preferences(request.args))
+        top_k = parse_top_k(request.args.get("top_k"))
+        projection = parse_projection(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    catalog = get_catalog()
+    
+    def compute():
+        recommendations = get_hero_recommendations(catalog.store.for_role(role), preferences, top_k=top_k)
+        return [{"hero": project_hero(recommendation["hero"], projection),
+                 "evaluation": recommendation["evaluation"]}
+                for recommendation in recommendations]
+    
+    key = response_cache.make_key("role", role, preference_key(preferences), catalog.tag, top_k, projection)
+    return conditional_json(key, catalog.last_modified, compute)
+
+@bp.route("/api/evaluate/batch", methods=["POST"])
+def api_evaluate_batch():
+    """API endpoint to score many heroes against many preference profiles"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No data provided"}), 400
+    
+    profiles = data.get("preferences")
+    if not isinstance(profiles, list) or not profiles:
+        return jsonify({"error": "preferences must be a non-empty list"}), 400
+    if len(profiles) > MAX_BATCH_PROFILES:
+        return jsonify({"error": f"At most {MAX_BATCH_PROFILES} preference profiles are allowed"}), 400
+    try:
+        profiles = [parse_preferences(profile) for profile in profiles]
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "Each preference profile must map attributes to numbers"}), 400
+    
+    # Select heroes by explicit ids or by role
+    catalog = get_catalog()
+    missing_ids = []
+    if "hero_ids" in data:
+        if not isinstance(data["hero_ids"], list):
+            return jsonify({"error": "hero_ids must be a list"}), 400
+        rows = []
+        for hero_id in data["hero_ids"]:
+            row = catalog.store.row_of(hero_id)
+            if row is not None:
+                rows.append(row)
+            else:
+                missing_ids.append(hero_id)
+        heroes = catalog.store.select(rows)
+    elif data.get("role"):
+        heroes = catalog.store.for_role(data["role"])
+    else:
+        return jsonify({"error": "Provide hero_ids or role"}), 400
+    
+    try:
+        suitability, preference_match, final_score = score_matrix(heroes, profiles)
+    except Exception as e:
+        logger.error("Error in batch evaluation: %s", e)
+        return jsonify({"error": str(e)}), 500
+    
+    def rows():
+        for i, hero in enumerate(heroes.heroes):
+            row = {"id": hero["id"], "name": hero["name"], "role": hero["role"]}
+            if math.isnan(suitability[i]):
+                row.update(error="Failed to evaluate hero: no fuzzy rule fired",
+                           suitability_score=0,
+                           preference_match=[0] * len(profiles),
+                           final_scores=[0] * len(profiles))
+            else:
+                row.update(suitability_score=round(float(suitability[i]), 2),
+                           preference_match=[round(float(v), 2) for v in preference_match[i]],
+                           final_scores=[round(float(v), 2) for v in final_score[i]])
+            yield row
+    
+    # Small matrices go out in one body; large ones are streamed row by row
+    if len(heroes) * len(profiles) <= BATCH_STREAM_THRESHOLD:
+        return jsonify({"profiles": profiles, "missing_ids": missing_ids, "heroes": list(rows())})
+    
+    def stream():
+        yield '{"profiles": %s, "missing_ids": %s, "heroes": [' % (json.dumps(profiles), json.dumps(missing_ids))
+        for i, row in enumerate(rows()):
+            yield ("," if i else "") + json.dumps(row)
+        yield "]}"
+    
+    return Response(stream(), mimetype="application/json")
+
 # Database CRUD API Endpoints
 
-@app.route("/api/heroes/<int:hero_id>", methods=["GET"])
+@bp.route("/api/heroes/<int:hero_id>", methods=["GET"])
 def api_get_hero(hero_id):
     """API endpoint to get a specific hero"""
     from database_manager import get_hero_by_id
     
-    hero = get_hero_by_id(hero_id)
+    try:
+        projection = parse_projection(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    hero = get_hero_by_id(hero_id, projection)
     if not hero:
         return jsonify({"error": "Hero not found"}), 404
     
     return jsonify(hero)
 
-@app.route("/api/heroes", methods=["POST"])
+@bp.route("/api/heroes", methods=["POST"])
 def api_add_hero():
     """API endpoint to add a new hero"""
     from database_manager import add_hero
@@ -178,15 +675,60 @@ def api_add_hero():
     if not result:
         return jsonify({"error": "Failed to add hero"}), 500
     
+    refresh_catalog()
+    profile_rankings.notify()
+    return jsonify(result), 201
+
+@bp.route("/api/heroes/bulk", methods=["POST"])
+def api_bulk_import_heroes():
+    """API endpoint to import many heroes from an NDJSON or CSV body"""
+    from database_manager import bulk_import_heroes
+    
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "ndjson")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    mode = request.args.get("mode", "insert")
+    if mode not in ("insert", "upsert"):
+        return jsonify({"error": f"Unsupported mode: {mode}"}), 400
+    
+    # Decode the body line by line so the upload is never buffered whole
+    lines = (line.decode("utf-8") for line in request.stream)
+    try:
+        result = bulk_import_heroes(read_records(lines, fmt), upsert=mode == "upsert")
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"error": "Failed to import heroes"}), 500
+    
+    refresh_catalog()
+    profile_rankings.notify()
     return jsonify(result), 201
 
-@app.route("/api/heroes/<int:hero_id>", methods=["PUT"])
+@bp.route("/api/heroes/export")
+def api_export_heroes():
+    """API endpoint to stream every hero as NDJSON or CSV"""
+    from database_manager import iter_heroes
+    
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    try:
+        projection = parse_projection(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    heroes = iter_heroes(projection=projection)
+    return Response(stream_with_context(write_records(heroes, fmt, HERO_PROJECTIONS[projection])),
+                    mimetype=mimetype)
+
+@bp.route("/api/heroes/<int:hero_id>", methods=["PUT"])
 def api_update_hero(hero_id):
     """API endpoint to update a hero"""
     from database_manager import update_hero, get_hero_by_id
     
     # Check if hero exists
-    hero = get_hero_by_id(hero_id)
+    hero = get_hero_by_id(hero_id, "summary")
     if not hero:
         return jsonify({"error": "Hero not found"}), 404
     
@@ -199,15 +741,17 @@ def api_update_hero(hero_id):
     if not result:
         return jsonify({"error": "Failed to update hero"}), 500
     
+    refresh_catalog()
+    profile_rankings.notify()
     return jsonify(result)
 
-@app.route("/api/heroes/<int:hero_id>", methods=["DELETE"])
+@bp.route("/api/heroes/<int:hero_id>", methods=["DELETE"])
 def api_delete_hero(hero_id):
     """API endpoint to delete a hero"""
     from database_manager import delete_hero, get_hero_by_id
     
     # Check if hero exists
-    hero = get_hero_by_id(hero_id)
+    hero = get_hero_by_id(hero_id, "summary")
     if not hero:
         return jsonify({"error": "Hero not found"}), 404
     
@@ -216,4 +760,70 @@ def api_delete_hero(hero_id):
     if not result:
         return jsonify({"error": "Failed to delete hero"}), 500
     
+    refresh_catalog()
+    profile_rankings.notify()
     return jsonify({"success": True, "message": f"Hero {hero_id} deleted successfully"})
+
+# Saved preference profile API Endpoints
+
+@bp.route("/api/profiles", methods=["POST"])
+def api_save_profile():
+    """API endpoint to save a preference profile; its rankings are computed in the background"""
+    from database_manager import save_user_preference
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No data provided"}), 400
+    
+    # Missing fields default to 5, like the UserPreference columns
+    profile = {}
+    for field in profile_rankings.PROFILE_FIELDS:
+        value = data.get(field, 5)
+        if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+                or value != int(value) or not 0 <= value <= 10):
+            return jsonify({"error": f"{field} must be an integer between 0 and 10"}), 400
+        profile[field] = int(value)
+    for field in ("role", "user_id"):
+        if data.get(field) is not None:
+            profile[field] = str(data[field])
+    
+    result = save_user_preference(profile)
+    if not result:
+        return jsonify({"error": "Failed to save profile"}), 500
+    
+    profile_rankings.notify()
+    return jsonify(result), 201
+
+@bp.route("/api/profiles/<int:profile_id>")
+def api_get_profile(profile_id):
+    """API endpoint to load a saved preference profile with its ranked heroes per role"""
+    from database_manager import get_user_preference
+    
+    try:
+        top_k = parse_top_k(request.args.get("top_k"))
+        projection = parse_projection(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    profile = get_user_preference(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+    
+    catalog = get_catalog()
+    rankings, precomputed = profile_rankings.load_rankings(catalog, profile)
+    role = request.args.get("role")
+    if role:
+        rankings = {role: rankings.get(role, [])}
+    
+    # Rankings are stored by hero ID; heroes come from the catalog they were computed from
+    return jsonify({
+        "profile": profile,
+        "catalog_version": catalog.version,
+        "precomputed": precomputed,
+        "rankings": {
+            role: [{"hero": project_hero(catalog.by_id[entry["hero_id"]], projection),
+                    "evaluation": entry["evaluation"]}
+                   for entry in ranking[:top_k]]
+            for role, ranking in rankings.items()
+        }
+    })
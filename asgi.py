@@ -0,0 +1,350 @@
+"""
+ASGI entry point for MLBB Hero Selector.
+
+Serves ``/api/evaluate_hero/<hero_id>`` and ``/api/recommendations`` on the
+event loop, with the same ETag and Last-Modified validators and 304 answers
+as the Flask routes. Concurrent identical requests share one computation,
+and distinct ones arriving together are scored in one vectorized pass. Every
+other route is passed through to the Flask app on a thread pool. Run it with any ASGI
+server, for example::
+
+    uvicorn asgi:application --workers 4
+
+The WSGI entry point ``main:app`` is unchanged.
+"""
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+from urllib.parse import parse_qsl
+from concurrent.futures import ThreadPoolExecutor
+
+from main import app
+from app import (parse_preferences, parse_top_k, parse_projection, preference_key, response_validators,
+                 is_not_modified, validator_headers, warm_up)
+from models import project_hero
+from fuzzy_logic import evaluate_heroes, get_hero_recommendations, quantize_preferences
+from hero_catalog import get_catalog
+from request_batcher import CoalescingBatcher
+from score_cache import response_cache
+import request_metrics
+
+logger = logging.getLogger(__name__)
+
+# Threads serving routes passed through to Flask
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", 16))
+
+# Response chunks buffered per Flask response before its thread waits for the client
+WSGI_QUEUE_SIZE = int(os.environ.get("ASGI_WSGI_QUEUE_SIZE", 16))
+
+_wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+def _catalog_store(catalog):
+    with app.app_context():
+        return catalog.store
+
+
+def _evaluate_batch(items):
+    """
+    Evaluate (catalog, hero ID, preferences) items against the catalog each request read.
+
+    Returns:
+        list: Evaluation per item, or None where the hero does not exist.
+    """
+    # A write between requests can put two catalog snapshots in one batch
+    groups = {}
+    for index, (catalog, _, _) in enumerate(items):
+        groups.setdefault(catalog.tag, (catalog, []))[1].append(index)
+
+    results = [None] * len(items)
+    for catalog, indices in groups.values():
+        store = _catalog_store(catalog)
+        rows = {i: store.row_of(items[i][1]) for i in indices}
+        found = [i for i in indices if rows[i] is not None]
+        suitability = None
+        if store.suitability is not None:
+            suitability = [store.suitability[rows[i]] for i in found]
+        evaluations = evaluate_heroes([store.heroes[rows[i]] for i in found],
+                                      [items[i][2] for i in found], suitability)
+        for i, evaluation in zip(found, evaluations):
+            results[i] = evaluation
+    return results
+
+
+def _recommend_batch(items):
+    """Rank heroes for each (catalog, role, preferences, top_k, projection) item."""
+    results = []
+    for catalog, role, preferences, top_k, projection in items:
+        store = _catalog_store(catalog)
+        recommendations = get_hero_recommendations(store.for_role(role), preferences, top_k=top_k)
+        results.append([{"hero": project_hero(recommendation["hero"], projection),
+                         "evaluation": recommendation["evaluation"]}
+                        for recommendation in recommendations])
+    return results
+
+
+evaluation_batcher = CoalescingBatcher(_evaluate_batch)
+recommendation_batcher = CoalescingBatcher(_recommend_batch)
+
+
+def _current_catalog():
+    with app.app_context():
+        return get_catalog()
+
+
+def _encode_headers(headers):
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+async def _send_json(send, status, payload, headers=()):
+    """Send a complete JSON response."""
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+                   + _encode_headers(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_conditional(scope, send, key, catalog, compute):
+    """
+    Answer with 304 if the client's copy of ``key`` is current, else with the computed payload.
+
+    Args:
+        key (tuple): Key from ``ResponseCache.make_key``, as the Flask route builds it.
+        catalog (HeroCatalog): Catalog the payload is computed from.
+        compute (coroutine function): Returns the payload, or None if not found.
+    """
+    etag, last_modified = response_validators(key, catalog.last_modified)
+    headers = validator_headers(etag, last_modified)
+    request_headers = {name.decode("latin-1").lower(): value.decode("latin-1")
+                       for name, value in scope.get("headers", [])}
+    if is_not_modified(etag, last_modified, request_headers.get("if-none-match"),
+                       request_headers.get("if-modified-since")):
+        await send({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": _encode_headers(headers),
+        })
+        await send({"type": "http.response.body", "body": b""})
+        return
+    payload = await compute()
+    if payload is None:
+        await _send_json(send, 404, {"error": "Hero not found"})
+        return
+    await _send_json(send, 200, payload, headers)
+
+
+async def _evaluate_hero(scope, send, hero_id):
+    """Coalesced, micro-batched ``/api/evaluate_hero/<hero_id>``."""
+    args = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+    try:
+        preferences = quantize_preferences(parse_preferences(args))
+    except ValueError as e:
+        await _send_json(send, 400, {"error": str(e)})
+        return
+    try:
+        # The catalog's version check may query the database, so it stays off the event loop
+        catalog = await asyncio.get_running_loop().run_in_executor(_wsgi_executor, _current_catalog)
+        hero = catalog.get_hero(hero_id)
+        if hero is None:
+            await _send_json(send, 404, {"error": "Hero not found"})
+            return
+        key = response_cache.make_key("hero", hero["id"], preference_key(preferences), catalog.tag)
+
+        async def compute():
+            # Keyed by catalog tag so the payload always matches the validators sent with it
+            return await evaluation_batcher.submit((catalog.tag, hero_id, preference_key(preferences)),
+                                                   (catalog, hero_id, preferences))
+
+        await _send_conditional(scope, send, key, catalog, compute)
+    except Exception as e:
+        await _send_json(send, 500, {"error": str(e)})
+
+
+async def _recommendations(scope, send):
+    """Coalesced ``/api/recommendations``."""
+    args = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+    role = args.get("role")
+    if not role:
+        await _send_json(send, 400, {"error": "Missing required parameter: role"})
+        return
+    try:
+        preferences = quantize_preferences(parse_preferences(args))
+        top_k = parse_top_k(args.get("top_k"))
+        projection = parse_projection(args.get("fields"))
+    except ValueError as e:
+        await _send_json(send, 400, {"error": str(e)})
+        return
+    try:
+        catalog = await asyncio.get_running_loop().run_in_executor(_wsgi_executor, _current_catalog)
+        key = response_cache.make_key("role", role, preference_key(preferences), catalog.tag, top_k, projection)
+
+        async def compute():
+            return await recommendation_batcher.submit(
+                (catalog.tag, role, preference_key(preferences), top_k, projection),
+                (catalog, role, preferences, top_k, projection))
+
+        await _send_conditional(scope, send, key, catalog, compute)
+    except Exception as e:
+        await _send_json(send, 500, {"error": str(e)})
+
+
+def _wsgi_environ(scope, body):
+    """Build a WSGI environ for an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        # The body is fully buffered, so its length is always known
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        if name == "CONTENT_TYPE":
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _call_wsgi(scope, receive, send):
+    """Serve a request with the Flask app, streaming its response."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+    loop = asyncio.get_running_loop()
+    # Bounded, so a streamed response is produced no faster than the client reads it
+    queue = asyncio.Queue(maxsize=WSGI_QUEUE_SIZE)
+    abandoned = threading.Event()
+
+    def put(message):
+        """Queue a message, waiting while the queue is full; False once nobody reads them."""
+        if abandoned.is_set():
+            return False
+        asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+        return True
+
+    def run():
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+            return lambda data: put(("body", data))
+
+        try:
+            result = app(_wsgi_environ(scope, body), start_response)
+            try:
+                for chunk in result:
+                    if started:
+                        put(("start", started[:]))
+                        started.clear()
+                    if chunk and not put(("body", chunk)):
+                        break
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+            if started:
+                put(("start", started[:]))
+            put(("end", None))
+        except Exception as e:
+            put(("error", e))
+
+    loop.run_in_executor(_wsgi_executor, run)
+    response_started = False
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "start":
+                status, headers = value
+                await send({
+                    "type": "http.response.start",
+                    "status": int(status.split(" ", 1)[0]),
+                    "headers": [(name.lower().encode("latin-1"), header.encode("latin-1"))
+                                for name, header in headers],
+                })
+                response_started = True
+            elif kind == "body":
+                await send({"type": "http.response.body", "body": value, "more_body": True})
+            elif kind == "end":
+                await send({"type": "http.response.body", "body": b""})
+                return
+            else:
+                logger.error("Error serving %s through Flask: %s", scope["path"], value)
+                if not response_started:
+                    await _send_json(send, 500, {"error": "Internal server error"})
+                return
+    finally:
+        # If the client went away mid-stream, free the thread waiting on a full queue
+        abandoned.set()
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def _lifespan(receive, send):
+    """Answer the server's startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Load the scoring engine and catalog before accepting traffic
+            try:
+                await asyncio.get_running_loop().run_in_executor(_wsgi_executor, warm_up, app)
+            except Exception as e:
+                logger.error("Warm-up failed, loading lazily instead: %s", e)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _wsgi_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"]
+    if scope["method"] == "GET":
+        # Requests served here skip Flask, so their latency is recorded here
+        started = time.perf_counter()
+        if path.startswith("/api/evaluate_hero/") and path.count("/") == 3:
+            await _evaluate_hero(scope, send, path.rsplit("/", 1)[1])
+            request_metrics.observe_request("/api/evaluate_hero/<hero_id>", "GET", time.perf_counter() - started)
+            return
+        if path == "/api/recommendations":
+            await _recommendations(scope, send)
+            request_metrics.observe_request("/api/recommendations", "GET", time.perf_counter() - started)
+            return
+    await _call_wsgi(scope, receive, send)
@@ -0,0 +1,289 @@
+"""
+Benchmark harness for the fuzzy evaluation and recommendation hot paths.
+
+Runs each benchmark on synthetic heroes generated from the ``hero_data``
+schema, reports latency percentiles and throughput, and optionally saves the
+results as JSON and compares them against a previous run::
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.25
+    python benchmark.py --cold-start
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+
+from hero_data import HEROES
+import fuzzy_logic
+from score_cache import suitability_cache
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_SEED = 1234
+
+# Integer attributes stored on every Hero row, with their valid range
+ATTRIBUTE_RANGES = {
+    "damage": (1, 10), "durability": (1, 10), "crowd_control": (1, 10),
+    "mobility": (1, 10), "difficulty": (1, 10),
+    "defense_overall": (1, 10), "offense_overall": (1, 10),
+    "skill_effect_overall": (1, 10), "difficulty_overall": (1, 10),
+    "movement_spd": (1, 10), "magic_defense": (1, 10), "mana": (1, 10),
+    "hp_regen": (1, 10), "physical_atk": (1, 10), "physical_defense": (1, 10),
+    "hp": (1, 10), "attack_speed": (1, 10), "mana_regen": (1, 10),
+}
+
+
+def generate_heroes(count, seed=DEFAULT_SEED):
+    """
+    Generate synthetic heroes shaped like ``hero_data.HEROES`` rows.
+
+    Each hero is a jittered copy of a real hero, with the additional
+    attributes the database model adds filled in at random.
+
+    Args:
+        count (int): Number of heroes to generate.
+        seed (int): Random seed, so runs are reproducible.
+
+    Returns:
+        list: Hero dictionaries in the ``Hero.to_dict()`` format.
+    """
+    rng = random.Random(seed)
+    heroes = []
+    for i in range(count):
+        template = HEROES[i % len(HEROES)]
+        hero = {key: value for key, value in template.items() if key != "id"}
+        hero["id"] = i + 1
+        hero["name"] = f"{template['name']} #{i + 1}"
+        for attr, (low, high) in ATTRIBUTE_RANGES.items():
+            base = template.get(attr, rng.randint(low, high))
+            hero[attr] = min(high, max(low, base + rng.randint(-1, 1)))
+        hero["win_rate"] = round(min(60.0, max(40.0, template["win_rate"] + rng.uniform(-3, 3))), 1)
+        hero["pick_rate"] = round(rng.uniform(0, 20), 1)
+        hero["ban_rate"] = round(rng.uniform(0, 20), 1)
+        hero["updated_at"] = None
+        heroes.append(hero)
+    return heroes
+
+
+def generate_preferences(count, seed=DEFAULT_SEED, weighted=False):
+    """Generate slider positions, and importance weights if ``weighted``, for ``count`` users."""
+    rng = random.Random(seed + 1)
+    keys = fuzzy_logic.PREFERENCE_ATTRIBUTES + (fuzzy_logic.IMPORTANCE_KEYS if weighted else [])
+    return [{key: float(rng.randint(1, 10)) for key in keys} for _ in range(count)]
+
+
+def measure(func, repeat, items=1, setup=None):
+    """
+    Time ``func`` ``repeat`` times.
+
+    Args:
+        func (callable): Function to time.
+        repeat (int): Number of timed runs.
+        items (int): Items processed per run, for throughput.
+        setup (callable, optional): Untimed call before every run.
+
+    Returns:
+        dict: Latency percentiles in milliseconds and throughput per second.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return {
+        "runs": repeat,
+        "items": items,
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(np.percentile(samples, 50)), 4),
+        "p90_ms": round(float(np.percentile(samples, 90)), 4),
+        "p99_ms": round(float(np.percentile(samples, 99)), 4),
+        "throughput_per_s": round(items * 1000 / float(samples.mean()), 2),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=30, seed=DEFAULT_SEED):
+    """
+    Run every benchmark.
+
+    Args:
+        sizes (list): Roster sizes for the recommendation benchmarks.
+        repeat (int): Timed runs per benchmark.
+        seed (int): Random seed for the synthetic data.
+
+    Returns:
+        dict: Benchmark name to measurement.
+    """
+    preferences = generate_preferences(1, seed)[0]
+    weighted_preferences = generate_preferences(1, seed, weighted=True)[0]
+    heroes = generate_heroes(max(sizes), seed)
+    hero = heroes[0]
+    fuzzy_logic.get_suitability_table()
+
+    results = {}
+    results["create_fuzzy_system"] = measure(fuzzy_logic.create_fuzzy_system, max(3, repeat // 10))
+    results["compute_suitability.skfuzzy"] = measure(lambda: fuzzy_logic.compute_suitability(hero), repeat,
+                                                     setup=fuzzy_logic.reset_simulation)
+    results["evaluate_hero.uncached"] = measure(lambda: fuzzy_logic.evaluate_hero(hero, preferences), repeat,
+                                                setup=suitability_cache.clear)
+    results["evaluate_hero.cached"] = measure(lambda: fuzzy_logic.evaluate_hero(hero, preferences), repeat)
+
+    for size in sizes:
+        roster = heroes[:size]
+        results[f"get_hero_recommendations.n{size}.uncached"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(roster, preferences), repeat, size,
+            setup=suitability_cache.clear)
+        results[f"get_hero_recommendations.n{size}.cached"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(roster, preferences), repeat, size)
+        results[f"get_hero_recommendations.n{size}.top5"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(roster, preferences, top_k=5), repeat, size,
+            setup=suitability_cache.clear)
+        store = fuzzy_logic.build_hero_store(roster)
+        results[f"get_hero_recommendations.n{size}.store"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(store, preferences), repeat, size)
+        results[f"get_hero_recommendations.n{size}.store.top5"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(store, preferences, top_k=5), repeat, size)
+        results[f"get_hero_recommendations.n{size}.store.weighted"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(store, weighted_preferences), repeat, size)
+        results[f"get_hero_recommendations.n{size}.store.weighted.top5"] = measure(
+            lambda: fuzzy_logic.get_hero_recommendations(store, weighted_preferences, top_k=5), repeat, size)
+    suitability_cache.clear()
+    return results
+
+
+# Run in a fresh interpreter per sample: import the app, optionally warm it up,
+# then serve one recommendation request
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+if sys.argv[1] == "warm":
+    from app import warm_up
+    warm_up(main.app)
+warmed = time.perf_counter()
+response = main.app.test_client().get("/api/recommendations?role=Tank")
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "warm_up_ms": (warmed - imported) * 1000,
+                  "first_request_ms": (done - warmed) * 1000, "total_ms": (done - started) * 1000}))
+"""
+
+
+def measure_cold_start(repeat=5, database_url=None):
+    """
+    Time application startup in fresh interpreters.
+
+    Each sample imports ``main`` (creating the app), then serves one
+    recommendation request either straight away, paying for the lazy loads
+    (``lazy``), or after ``warm_up`` as a preloading gunicorn master would
+    (``warm``).
+
+    Args:
+        repeat (int): Samples per mode.
+        database_url (str, optional): Database to use; a temporary SQLite
+            database, initialized first, when omitted.
+
+    Returns:
+        dict: Mean milliseconds per phase, by mode.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PROFILE_RANKING_WORKER="0", INIT_DB_ON_STARTUP="0",
+                   DATABASE_URL=database_url or f"sqlite:///{os.path.join(directory, 'cold_start.db')}")
+        if database_url is None:
+            subprocess.run([sys.executable, "-m", "flask", "--app", "main", "init-db"],
+                           cwd=here, env=env, check=True, capture_output=True)
+        results = {}
+        for mode in ("lazy", "warm"):
+            samples = []
+            for _ in range(repeat):
+                output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, mode],
+                                        cwd=here, env=env, check=True, capture_output=True, text=True).stdout
+                samples.append(json.loads(output.strip().splitlines()[-1]))
+            results[mode] = {phase: round(float(np.mean([sample[phase] for sample in samples])), 1)
+                             for phase in samples[0]}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find benchmarks whose median latency regressed past ``threshold``.
+
+    Args:
+        results (dict): Current measurements.
+        baseline (dict): Measurements from a previous run.
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list: (name, baseline p50, current p50) for every regression.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and current["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+            regressions.append((name, previous["p50_ms"], current["p50_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="roster sizes")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="random seed for synthetic data")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results saved by a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative p50 slowdown")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="only time application startup, in fresh interpreters")
+    args = parser.parse_args(argv)
+
+    if args.cold_start:
+        print(f"{'mode':<8} {'import ms':>10} {'warm-up ms':>11} {'1st req ms':>11} {'total ms':>10}")
+        for mode, result in measure_cold_start(max(1, min(args.repeat, 5))).items():
+            print(f"{mode:<8} {result['import_ms']:>10.1f} {result['warm_up_ms']:>11.1f} "
+                  f"{result['first_request_ms']:>11.1f} {result['total_ms']:>10.1f}")
+        return 0
+
+    results = run_benchmarks(args.sizes, args.repeat, args.seed)
+
+    print(f"{'benchmark':<48} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'items/s':>12}")
+    for name, result in results.items():
+        print(f"{name:<48} {result['p50_ms']:>10.3f} {result['p90_ms']:>10.3f} "
+              f"{result['p99_ms']:>10.3f} {result['throughput_per_s']:>12.1f}")
+
+    if args.output:
+        report = {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: p50 {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""
+Pluggable storage backends for the hero catalog and scoring caches.
+
+``CACHE_BACKEND`` selects where cached values live:
+
+- ``local`` (default): an LRU inside each process.
+- ``shm``: files on a shared-memory filesystem (``CACHE_SHM_DIR``, by default
+  under ``/dev/shm``), shared by every worker on the host.
+- ``redis``: any server speaking the Redis protocol at ``CACHE_REDIS_URL``,
+  shared by every host.
+
+Shared backends store JSON, so cached values must be JSON serializable. A
+backend that fails never fails the request: errors are logged and treated
+as cache misses. Redis connections are dropped in forked children, so
+workers forked from a preloaded master open their own.
+"""
+import os
+import json
+import time
+import socket
+import hashlib
+import logging
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.environ.get("CACHE_BACKEND", "local")
+SHM_DIR = os.environ.get("CACHE_SHM_DIR") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "mlbb-hero-cache")
+REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 4096))
+
+# Every RedisBackend of this process, for reset_connections
+_redis_backends = weakref.WeakSet()
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_size):
+        """
+        Args:
+            max_size (int): Maximum number of entries to keep.
+        """
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` and mark it as recently used."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting the oldest entry if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Remove ``key`` if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalBackend:
+    """In-process LRU; values are stored as-is, without serialization."""
+
+    shared = False
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self._entries = LRUCache(max_entries)
+
+    def get(self, key):
+        """Return the value stored under ``key``, or None."""
+        return self._entries.get(key)
+
+    def get_many(self, keys):
+        """Return the values stored under ``keys``, None where missing."""
+        return [self._entries.get(key) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key``; ``ttl`` is ignored, the LRU bounds the size."""
+        self._entries.set(key, value)
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair."""
+        for key, value in items:
+            self._entries.set(key, value)
+
+    def delete(self, key):
+        """Remove ``key`` if present."""
+        self._entries.pop(key)
+
+    def clear(self):
+        """Remove every entry."""
+        self._entries.clear()
+
+
+class SharedMemoryBackend:
+    """
+    One file per entry on a shared-memory filesystem.
+
+    Writes go to a temporary file that is renamed into place, so readers in
+    other processes see either the old or the new value and no locks are
+    needed. Once more than ``max_entries`` files exist, the least recently
+    written ones are removed.
+    """
+
+    shared = True
+
+    # Sets between checks of the entry count
+    EVICTION_INTERVAL = 64
+
+    def __init__(self, directory=SHM_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._sets = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def get(self, key):
+        """Return the value stored under ``key``, or None if missing or expired."""
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Shared memory cache read failed: %s", e)
+            return None
+        if entry["key"] != key or (entry["expires"] is not None and entry["expires"] < time.time()):
+            return None
+        return entry["value"]
+
+    def get_many(self, keys):
+        """Return the values stored under ``keys``, None where missing."""
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key``, expiring after ``ttl`` seconds if given."""
+        entry = {"key": key, "expires": time.time() + ttl if ttl else None, "value": value}
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(entry).encode("utf-8"))
+            os.replace(temp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Shared memory cache write failed: %s", e)
+            return
+        self._sets += 1
+        if self._sets % self.EVICTION_INTERVAL == 0:
+            self._evict()
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair."""
+        for key, value in items:
+            self.set(key, value, ttl)
+
+    def delete(self, key):
+        """Remove ``key`` if present."""
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Shared memory cache delete failed: %s", e)
+
+    def clear(self):
+        """Remove every entry."""
+        for name in os.listdir(self.directory):
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Remove the oldest entries once there are too many."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if not entry.name.startswith(".")]
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            # Trim to 90% so eviction does not run on every check
+            for entry in entries[:len(entries) - int(self.max_entries * 0.9)]:
+                os.unlink(entry.path)
+        except OSError as e:
+            logger.warning("Shared memory cache eviction failed: %s", e)
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend:
+    """
+    Minimal Redis-protocol (RESP) client over a single socket.
+
+    Keys are namespaced with ``prefix``; ``clear`` removes only those keys.
+    """
+
+    shared = True
+
+    # Seconds to stop trying after the server could not be reached
+    RETRY_INTERVAL = 5.0
+
+    def __init__(self, url=REDIS_URL, prefix="mlbb:", timeout=1.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        _redis_backends.add(self)
+
+    def reset(self):
+        """
+        Forget the connection without touching the socket's other owners.
+
+        Called in a forked child, whose copy of the socket is shared with its
+        parent: using it would interleave both processes' replies.
+        """
+        # The parent's lock may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self._close()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if self.password:
+                self._send([("AUTH", self.password)])
+            if self.db:
+                self._send([("SELECT", self.db)])
+        except RedisError:
+            # Never leave an unauthenticated connection or one on the wrong database behind
+            self._close()
+            raise
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    @staticmethod
+    def _encode(args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        """Read one reply; error replies are returned as ``RedisError`` instances, not raised."""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        # The stream can no longer be trusted to line up with our commands
+        raise ConnectionError(f"Unexpected reply: {line!r}")
+
+    def _send(self, commands):
+        """
+        Pipeline ``commands`` and return their replies, in order.
+
+        Every reply is read before an error reply is raised, so the next
+        command never reads a reply left over from this pipeline.
+        """
+        self._sock.sendall(b"".join(self._encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _execute(self, commands):
+        """Run a pipeline, reconnecting once; returns None if the server is unreachable."""
+        with self._lock:
+            if time.monotonic() < self._down_until:
+                return None
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(commands)
+                except (OSError, ConnectionError) as e:
+                    self._close()
+                    if attempt:
+                        logger.warning("Redis cache unavailable: %s", e)
+                        self._down_until = time.monotonic() + self.RETRY_INTERVAL
+                except RedisError as e:
+                    logger.warning("Redis cache error: %s", e)
+                    return None
+        return None
+
+    def get(self, key):
+        """Return the value stored under ``key``, or None."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Return the values stored under ``keys``, None where missing."""
+        if not keys:
+            return []
+        replies = self._execute([("MGET",) + tuple(self.prefix + key for key in keys)])
+        if replies is None:
+            return [None] * len(keys)
+        values = []
+        for key, value in zip(keys, replies[0]):
+            try:
+                values.append(json.loads(value) if value is not None else None)
+            except ValueError:
+                # A value this client did not write counts as a miss
+                logger.warning("Ignoring undecodable Redis cache value under %s", key)
+                values.append(None)
+        return values
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key``, expiring after ``ttl`` seconds if given."""
+        self.set_many([(key, value)], ttl)
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair in one round trip."""
+        commands = []
+        for key, value in items:
+            command = ("SET", self.prefix + key, json.dumps(value))
+            if ttl:
+                command += ("PX", int(ttl * 1000))
+            commands.append(command)
+        if commands:
+            self._execute(commands)
+
+    def delete(self, key):
+        """Remove ``key`` if present."""
+        self._execute([("DEL", self.prefix + key)])
+
+    def clear(self):
+        """Remove every key under this backend's prefix."""
+        cursor = b"0"
+        while True:
+            replies = self._execute([("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)])
+            if replies is None:
+                return
+            cursor, keys = replies[0]
+            if keys:
+                self._execute([("DEL",) + tuple(keys)])
+            if cursor == b"0":
+                return
+
+
+def reset_connections():
+    """Drop every Redis connection of this process; the next command reconnects."""
+    for backend in list(_redis_backends):
+        backend.reset()
+
+
+# Closing the child's copy of a socket leaves the parent's connection open
+os.register_at_fork(after_in_child=reset_connections)
+
+
+def create_backend(namespace, max_entries=DEFAULT_MAX_ENTRIES, name=None):
+    """
+    Create a cache backend.
+
+    Args:
+        namespace (str): Keeps caches sharing a backend from seeing, or
+            clearing, each other's entries.
+        max_entries (int): Size bound for the local and shared memory backends.
+        name (str, optional): ``local``, ``shm`` or ``redis``; defaults to ``CACHE_BACKEND``.
+
+    Returns:
+        The backend.
+    """
+    name = name or BACKEND
+    if name == "local":
+        return LocalBackend(max_entries)
+    if name == "shm":
+        return SharedMemoryBackend(os.path.join(SHM_DIR, namespace), max_entries)
+    if name == "redis":
+        return RedisBackend(prefix=f"mlbb:{namespace}:")
+    raise ValueError(f"Unknown cache backend: {name}")
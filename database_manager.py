@@ -2,22 +2,51 @@
 Database manager for MLBB Hero Selector.
 This module provides functions to manage the database operations.
 """
+import json
+import math
 import logging
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from database import db
-from models import Hero, HeroStrength, HeroWeakness, UserPreference
+from models import (Hero, HeroStrength, HeroWeakness, UserPreference, CatalogState, ProfileRanking,
+                    HERO_PROJECTIONS)
+from score_cache import suitability_cache, catalog_cache
 from hero_data import get_all_heroes as get_all_heroes_static
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Primary key of the single catalog version row
+CATALOG_STATE_ID = 1
+
+# Rows per statement for bulk import and export
+BULK_BATCH_SIZE = 500
+
+# Values an Integer column holds on every supported database
+IMPORT_INTEGER_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+# Heroes per page for paginated listing
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Hero columns a bulk import may set, with the model defaults for missing values
+HERO_IMPORT_COLUMNS = {
+    column.name: column.default.arg if column.default is not None and not callable(column.default.arg) else None
+    for column in Hero.__table__.columns
+    if column.name not in ('id', 'created_at', 'updated_at')
+}
+
 def create_initial_data():
     """
     Populate the database with initial hero data.
     This function should be called once after creating the database tables.
     """
     try:
+        # Make sure the catalog version row exists
+        if CatalogState.query.get(CATALOG_STATE_ID) is None:
+            db.session.add(CatalogState(id=CATALOG_STATE_ID, version=0))
+            db.session.commit()
+        
         # Check if heroes already exist in the database
         if Hero.query.count() > 0:
             logger.info("Initial data already exists in the database.")
@@ -26,95 +55,334 @@ def create_initial_data():
         # Get static hero data from hero_data.py
         static_heroes = get_all_heroes_static()
         
-        # Add heroes to the database
-        for hero_data in static_heroes:
-            # Extract strengths and weaknesses
-            strengths = hero_data.pop('strengths', [])
-            weaknesses = hero_data.pop('weaknesses', [])
-            
-            # Create hero instance
-            hero = Hero(
-                name=hero_data['name'],
-                role=hero_data['role'],
-                description=hero_data.get('description', ''),
-                damage=hero_data.get('damage', 5),
-                durability=hero_data.get('durability', 5),
-                crowd_control=hero_data.get('crowd_control', 5),
-                mobility=hero_data.get('mobility', 5),
-                difficulty=hero_data.get('difficulty', 5),
-                win_rate=hero_data.get('win_rate', 50.0),
-                profit_factor=hero_data.get('profit_factor', 1.0),
-                max_drawdown=hero_data.get('max_drawdown', 20.0),
-                max_consecutive_loss=hero_data.get('max_consecutive_loss', 3)
-            )
-            
-            # Add strengths
-            for strength in strengths:
-                hero.strengths.append(HeroStrength(text=strength))
-            
-            # Add weaknesses
-            for weakness in weaknesses:
-                hero.weaknesses.append(HeroWeakness(text=weakness))
-            
-            # Add hero to database session
-            db.session.add(hero)
-        
-        # Commit all changes to the database
-        db.session.commit()
-        logger.info(f"Added {len(static_heroes)} heroes to the database.")
+        # Load heroes and their strengths and weaknesses in batches
+        if bulk_import_heroes(static_heroes) is None:
+            return False
+        logger.info("Added %d heroes to the database.", len(static_heroes))
         return True
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Error creating initial data: {str(e)}")
+        logger.error("Error creating initial data: %s", e)
         return False
 
-def get_all_heroes():
+def _hero_import_row(record, line):
+    """Build a full hero row from an import record, filling in model defaults."""
+    if not record.get('name') or not record.get('role'):
+        raise ValueError(f"Record {line}: missing required field name or role")
+    row = {}
+    provided = []
+    for name, default in HERO_IMPORT_COLUMNS.items():
+        value = record.get(name)
+        if value is None or value == '':
+            value = default
+        else:
+            provided.append(name)
+            if name not in ('name', 'role', 'description'):
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Record {line}: {name} must be a number")
+                except OverflowError:
+                    raise ValueError(f"Record {line}: {name} is out of range")
+                if not math.isfinite(number):
+                    raise ValueError(f"Record {line}: {name} must be a finite number")
+                if isinstance(Hero.__table__.c[name].type, db.Float):
+                    value = number
+                else:
+                    value = int(number)
+                    if not IMPORT_INTEGER_RANGE[0] <= value <= IMPORT_INTEGER_RANGE[1]:
+                        raise ValueError(f"Record {line}: {name} is out of range")
+        row[name] = value
+    return row, provided
+
+def _is_duplicate_name(error):
+    """Tell whether an IntegrityError is the unique constraint on hero names."""
+    message = str(error.orig).lower()
+    return ('unique' in message or 'duplicate' in message) and 'name' in message
+
+def _flush_import_batch(batch, upsert):
+    """Write one batch of parsed import records; return (inserted, updated)."""
+    existing = {}
+    if upsert:
+        names = [entry['row']['name'] for entry in batch]
+        existing = dict(db.session.execute(select(Hero.name, Hero.id).where(Hero.name.in_(names))).all())
+    
+    # New heroes get full rows; existing ones only the columns the record provided
+    new_rows = [entry['row'] for entry in batch if entry['row']['name'] not in existing]
+    ids = dict(existing)
+    if new_rows:
+        result = db.session.execute(insert(Hero).returning(Hero.name, Hero.id), new_rows)
+        ids.update(dict(result.all()))
+    updates = [dict({key: entry['row'][key] for key in entry['provided']}, id=existing[entry['row']['name']])
+               for entry in batch if entry['row']['name'] in existing]
+    if updates:
+        db.session.execute(update(Hero), updates)
+    
+    # Child rows are replaced only for the lists a record provided
+    for field, model in (('strengths', HeroStrength), ('weaknesses', HeroWeakness)):
+        replaced = [existing[entry['row']['name']] for entry in batch
+                    if entry['row']['name'] in existing and entry[field] is not None]
+        if replaced:
+            db.session.execute(delete(model).where(model.hero_id.in_(replaced)))
+        children = [{'hero_id': ids[entry['row']['name']], 'text': text}
+                    for entry in batch for text in entry[field] or []]
+        if children:
+            db.session.execute(insert(model), children)
+    
+    for hero_id in existing.values():
+        suitability_cache.invalidate(hero_id)
+    return len(new_rows), len(existing)
+
+def bulk_import_heroes(records, upsert=False, batch_size=BULK_BATCH_SIZE):
+    """
+    Import heroes with batched core inserts, in a single transaction.
+    
+    Args:
+        records (iterable): Hero dictionaries, e.g. streamed from NDJSON or CSV.
+        upsert (bool): Update heroes whose name already exists instead of failing;
+            only the fields a record provides are changed.
+        batch_size (int): Heroes per insert statement.
+        
+    Returns:
+        dict: Counts of inserted and updated heroes, or None if the database failed.
+        
+    Raises:
+        ValueError: If a record is invalid or, without upsert, a name already
+            exists; nothing is imported.
+    """
+    inserted = updated = 0
+    try:
+        batch = []
+        seen = set()
+        for line, record in enumerate(records, start=1):
+            row, provided = _hero_import_row(record, line)
+            if row['name'] in seen:
+                raise ValueError(f"Record {line}: duplicate hero name {row['name']!r}")
+            seen.add(row['name'])
+            batch.append({
+                'row': row,
+                'provided': provided,
+                'strengths': list(record['strengths']) if record.get('strengths') is not None else None,
+                'weaknesses': list(record['weaknesses']) if record.get('weaknesses') is not None else None
+            })
+            if len(batch) >= batch_size:
+                counts = _flush_import_batch(batch, upsert)
+                inserted, updated = inserted + counts[0], updated + counts[1]
+                batch = []
+        if batch:
+            counts = _flush_import_batch(batch, upsert)
+            inserted, updated = inserted + counts[0], updated + counts[1]
+        
+        bump_catalog_version()
+        db.session.commit()
+        catalog_cache.invalidate()
+        logger.info("Bulk imported heroes: %d inserted, %d updated", inserted, updated)
+        return {"inserted": inserted, "updated": updated}
+    
+    except ValueError:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        logger.warning("Bulk import rejected: %s", e.orig)
+        if _is_duplicate_name(e):
+            raise ValueError("A hero with one of these names already exists; use upsert mode to update it")
+        raise ValueError("A record violates a database constraint; nothing was imported")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error("Database error when bulk importing heroes: %s", e)
+        return None
+
+def _check_projection(projection):
+    """Raise ValueError for projection names not in ``HERO_PROJECTIONS``."""
+    if projection not in HERO_PROJECTIONS:
+        raise ValueError(f"Unknown projection: {projection}")
+
+def _projection_select(projection, role=None, after_id=None):
+    """
+    Build a column-only SELECT for a partial projection, in ID order.
+    
+    Rows come back as plain tuples, so no Hero objects are built or tracked
+    in the identity map.
+    """
+    columns = HERO_PROJECTIONS[projection]
+    stmt = select(*(Hero.__table__.c[name] for name in columns))
+    if role:
+        stmt = stmt.where(Hero.role == role)
+    if after_id is not None:
+        stmt = stmt.where(Hero.id > after_id)
+    return stmt.order_by(Hero.id)
+
+def iter_heroes(role=None, after_id=None, limit=None, batch_size=BULK_BATCH_SIZE, projection="full"):
+    """
+    Stream heroes in ID order from a server-side cursor.
+    
+    Rows are fetched ``batch_size`` at a time, with strengths and weaknesses
+    loaded per batch, so memory stays flat however large the table grows.
+    
+    Args:
+        role (str, optional): Only stream heroes with this role.
+        after_id (int, optional): Keyset cursor; only heroes with a larger ID are streamed.
+        limit (int, optional): Maximum number of heroes to stream.
+        batch_size (int): Rows fetched per round trip.
+        projection (str): Key of ``HERO_PROJECTIONS``.
+        
+    Yields:
+        dict: Hero dictionaries.
+    """
+    _check_projection(projection)
+    if projection != "full":
+        stmt = _projection_select(projection, role, after_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = db.session.execute(stmt, execution_options={"yield_per": batch_size})
+        for row in result.mappings():
+            yield dict(row)
+        return
+    
+    query = Hero.query_with_details()
+    if role:
+        query = query.filter_by(role=role)
+    if after_id is not None:
+        query = query.filter(Hero.id > after_id)
+    query = query.order_by(Hero.id)
+    if limit is not None:
+        query = query.limit(limit)
+    # yield_per turns on stream_results, so drivers that support it keep the
+    # result set on the server; objects go out of scope once serialized
+    for hero in query.yield_per(batch_size):
+        yield hero.to_dict()
+
+def get_heroes_page(after_id=None, limit=DEFAULT_PAGE_SIZE, role=None, projection="full"):
+    """
+    Get one keyset-paginated page of heroes in ID order.
+    
+    Args:
+        after_id (int, optional): Cursor from the previous page; None for the first page.
+        limit (int): Page size.
+        role (str, optional): Only list heroes with this role.
+        projection (str): Key of ``HERO_PROJECTIONS``.
+        
+    Returns:
+        tuple: (list of hero dictionaries, cursor for the next page or None on the last page).
+    """
+    _check_projection(projection)
+    try:
+        if projection != "full":
+            # One extra row tells us whether another page follows
+            stmt = _projection_select(projection, role, after_id).limit(limit + 1)
+            rows = db.session.execute(stmt).mappings().all()
+            next_cursor = rows[limit - 1]["id"] if len(rows) > limit and limit > 0 else None
+            return [dict(row) for row in rows[:limit]], next_cursor
+        
+        query = Hero.query_with_details()
+        if role:
+            query = query.filter_by(role=role)
+        if after_id is not None:
+            query = query.filter(Hero.id > after_id)
+        # One extra row tells us whether another page follows
+        heroes = query.order_by(Hero.id).limit(limit + 1).all()
+        next_cursor = heroes[limit - 1].id if len(heroes) > limit and limit > 0 else None
+        return [hero.to_dict() for hero in heroes[:limit]], next_cursor
+    except SQLAlchemyError as e:
+        logger.error("Database error when getting a page of heroes: %s", e)
+        return [], None
+
+def get_catalog_version():
+    """
+    Get the current hero catalog version.
+    
+    Returns:
+        int: Catalog version, 0 if it was never bumped.
+    """
+    version = db.session.query(CatalogState.version).filter_by(id=CATALOG_STATE_ID).scalar()
+    return version or 0
+
+def get_catalog_state():
+    """
+    Get the current hero catalog version and when it last changed.
+    
+    Returns:
+        tuple: (catalog version, 0 if it was never bumped; naive UTC datetime or None).
+    """
+    state = db.session.query(CatalogState.version, CatalogState.updated_at).filter_by(id=CATALOG_STATE_ID).first()
+    return (state.version or 0, state.updated_at) if state else (0, None)
+
+def bump_catalog_version():
+    """
+    Increment the hero catalog version in the current transaction.
+    
+    Call this before committing any write to heroes or their children so
+    other workers notice their catalog snapshot is stale.
+    """
+    updated = CatalogState.query.filter_by(id=CATALOG_STATE_ID).update(
+        {CatalogState.version: CatalogState.version + 1, CatalogState.updated_at: datetime.utcnow()},
+        synchronize_session=False)
+    if not updated:
+        db.session.add(CatalogState(id=CATALOG_STATE_ID, version=1))
+
+def get_all_heroes(projection="full"):
     """
     Get all heroes from the database.
     
+    Args:
+        projection (str): Key of ``HERO_PROJECTIONS``.
+        
     Returns:
         list: List of hero dictionaries.
     """
+    _check_projection(projection)
     try:
-        heroes = Hero.query.all()
+        if projection != "full":
+            return [dict(row) for row in db.session.execute(_projection_select(projection)).mappings()]
+        heroes = Hero.query_with_details().all()
         return [hero.to_dict() for hero in heroes]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting all heroes: {str(e)}")
+        logger.error("Database error when getting all heroes: %s", e)
         return []
 
-def get_heroes_by_role(role):
+def get_heroes_by_role(role, projection="full"):
     """
     Get heroes by role from the database.
     
     Args:
         role (str): Hero role to filter by.
+        projection (str): Key of ``HERO_PROJECTIONS``.
         
     Returns:
         list: List of hero dictionaries matching the role.
     """
+    _check_projection(projection)
     try:
-        heroes = Hero.query.filter_by(role=role).all()
+        if projection != "full":
+            return [dict(row) for row in db.session.execute(_projection_select(projection, role)).mappings()]
+        heroes = Hero.query_with_details().filter_by(role=role).all()
         return [hero.to_dict() for hero in heroes]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting heroes by role: {str(e)}")
+        logger.error("Database error when getting heroes by role: %s", e)
         return []
 
-def get_hero_by_id(hero_id):
+def get_hero_by_id(hero_id, projection="full"):
     """
     Get a hero by ID from the database.
     
     Args:
         hero_id (int): Hero ID to retrieve.
+        projection (str): Key of ``HERO_PROJECTIONS``.
         
     Returns:
         dict: Hero dictionary or None if not found.
     """
+    _check_projection(projection)
     try:
-        hero = Hero.query.get(hero_id)
+        if projection != "full":
+            row = db.session.execute(_projection_select(projection).where(Hero.id == hero_id)).mappings().first()
+            return dict(row) if row else None
+        hero = Hero.query_with_details().get(hero_id)
         return hero.to_dict() if hero else None
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting hero by ID: {str(e)}")
+        logger.error("Database error when getting hero by ID: %s", e)
         return None
 
 def get_all_roles():
@@ -128,7 +396,7 @@ def get_all_roles():
         roles = db.session.query(Hero.role).distinct().all()
         return [role[0] for role in roles]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting all roles: {str(e)}")
+        logger.error("Database error when getting all roles: %s", e)
         return []
 
 def add_hero(hero_data):
@@ -158,13 +426,16 @@ def add_hero(hero_data):
         
         # Add to database
         db.session.add(new_hero)
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(new_hero.id)
+        catalog_cache.invalidate()
         
         return new_hero.to_dict()
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when adding hero: {str(e)}")
+        logger.error("Database error when adding hero: %s", e)
         return None
 
 def update_hero(hero_id, hero_data):
@@ -206,12 +477,15 @@ def update_hero(hero_id, hero_data):
             if hasattr(hero, key):
                 setattr(hero, key, value)
         
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(hero_id)
+        catalog_cache.invalidate()
         return hero.to_dict()
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when updating hero: {str(e)}")
+        logger.error("Database error when updating hero: %s", e)
         return None
 
 def delete_hero(hero_id):
@@ -230,12 +504,15 @@ def delete_hero(hero_id):
             return False
         
         db.session.delete(hero)
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(hero_id)
+        catalog_cache.invalidate()
         return True
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when deleting hero: {str(e)}")
+        logger.error("Database error when deleting hero: %s", e)
         return False
 
 def save_user_preference(preference_data):
@@ -256,7 +533,7 @@ def save_user_preference(preference_data):
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when saving user preference: {str(e)}")
+        logger.error("Database error when saving user preference: %s", e)
         return None
 
 def get_user_preference(preference_id):
@@ -274,5 +551,82 @@ def get_user_preference(preference_id):
         return preference.to_dict() if preference else None
     
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting user preference: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Database error when getting user preference: %s", e)
+        return None
+
+def get_profile_rankings(preference_id):
+    """
+    Get the precomputed rankings of a saved preference profile.
+    
+    Args:
+        preference_id (int): Preference ID.
+        
+    Returns:
+        tuple: (catalog version, rule base fingerprint, rankings by role),
+        or None if not computed yet.
+    """
+    try:
+        ranking = ProfileRanking.query.filter_by(preference_id=preference_id).first()
+        if ranking is None:
+            return None
+        return ranking.catalog_version, ranking.rule_base, json.loads(ranking.rankings)
+    
+    except SQLAlchemyError as e:
+        logger.error("Database error when getting profile rankings: %s", e)
+        return None
+
+def save_profile_rankings(preference_id, catalog_version, rule_base, rankings):
+    """
+    Store the rankings of a saved preference profile, replacing older ones.
+    
+    Args:
+        preference_id (int): Preference ID.
+        catalog_version (int): Catalog version the rankings were computed from.
+        rule_base (str): Fingerprint of the rule base that scored them.
+        rankings (dict): Ranked ``{"hero_id", "evaluation"}`` lists by role.
+        
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    try:
+        ranking = ProfileRanking.query.filter_by(preference_id=preference_id).first()
+        if ranking is None:
+            ranking = ProfileRanking(preference_id=preference_id)
+            db.session.add(ranking)
+        ranking.catalog_version = catalog_version
+        ranking.rule_base = rule_base
+        ranking.rankings = json.dumps(rankings)
+        db.session.commit()
+        return True
+    
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error("Database error when saving profile rankings: %s", e)
+        return False
+
+def get_stale_profiles(catalog_version, rule_base, limit):
+    """
+    Get saved preference profiles whose rankings are missing or out of date.
+    
+    Args:
+        catalog_version (int): Current catalog version.
+        rule_base (str): Fingerprint of the current rule base.
+        limit (int): Maximum number of profiles to return.
+        
+    Returns:
+        list: Preference dictionaries, oldest first.
+    """
+    try:
+        profiles = (UserPreference.query
+                    .outerjoin(ProfileRanking, ProfileRanking.preference_id == UserPreference.id)
+                    .filter(db.or_(ProfileRanking.id.is_(None),
+                                   ProfileRanking.catalog_version != catalog_version,
+                                   ProfileRanking.rule_base != rule_base))
+                    .order_by(UserPreference.id)
+                    .limit(limit)
+                    .all())
+        return [profile.to_dict() for profile in profiles]
+    
+    except SQLAlchemyError as e:
+        logger.error("Database error when getting stale profiles: %s", e)
+        return []
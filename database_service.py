@@ -6,9 +6,9 @@ import logging
 from sqlalchemy.exc import SQLAlchemyError
 from app import db
 from models import Hero, HeroStrength, HeroWeakness, UserPreference
+from score_cache import suitability_cache, catalog_cache
+from database_manager import bump_catalog_version
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def get_all_heroes_from_db():
@@ -19,10 +19,10 @@ def get_all_heroes_from_db():
         list: List of hero dictionaries.
     """
     try:
-        heroes = Hero.query.all()
+        heroes = Hero.query_with_details().all()
         return [hero.to_dict() for hero in heroes]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting all heroes: {str(e)}")
+        logger.error("Database error when getting all heroes: %s", e)
         return []
 
 def get_heroes_by_role_from_db(role):
@@ -36,10 +36,10 @@ def get_heroes_by_role_from_db(role):
         list: List of hero dictionaries matching the role.
     """
     try:
-        heroes = Hero.query.filter_by(role=role).all()
+        heroes = Hero.query_with_details().filter_by(role=role).all()
         return [hero.to_dict() for hero in heroes]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting heroes by role: {str(e)}")
+        logger.error("Database error when getting heroes by role: %s", e)
         return []
 
 def get_hero_by_id_from_db(hero_id):
@@ -53,10 +53,10 @@ def get_hero_by_id_from_db(hero_id):
         dict: Hero dictionary or None if not found.
     """
     try:
-        hero = Hero.query.get(hero_id)
+        hero = Hero.query_with_details().get(hero_id)
         return hero.to_dict() if hero else None
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting hero by ID: {str(e)}")
+        logger.error("Database error when getting hero by ID: %s", e)
         return None
 
 def get_all_roles_from_db():
@@ -70,7 +70,7 @@ def get_all_roles_from_db():
         roles = db.session.query(Hero.role).distinct().all()
         return [role[0] for role in roles]
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting all roles: {str(e)}")
+        logger.error("Database error when getting all roles: %s", e)
         return []
 
 def add_hero_to_db(hero_data):
@@ -100,13 +100,16 @@ def add_hero_to_db(hero_data):
         
         # Add to database
         db.session.add(new_hero)
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(new_hero.id)
+        catalog_cache.invalidate()
         
         return new_hero.to_dict()
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when adding hero: {str(e)}")
+        logger.error("Database error when adding hero: %s", e)
         return None
 
 def update_hero_in_db(hero_id, hero_data):
@@ -148,12 +151,15 @@ def update_hero_in_db(hero_id, hero_data):
             if hasattr(hero, key):
                 setattr(hero, key, value)
         
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(hero_id)
+        catalog_cache.invalidate()
         return hero.to_dict()
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when updating hero: {str(e)}")
+        logger.error("Database error when updating hero: %s", e)
         return None
 
 def delete_hero_from_db(hero_id):
@@ -172,12 +178,15 @@ def delete_hero_from_db(hero_id):
             return False
         
         db.session.delete(hero)
+        bump_catalog_version()
         db.session.commit()
+        suitability_cache.invalidate(hero_id)
+        catalog_cache.invalidate()
         return True
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when deleting hero: {str(e)}")
+        logger.error("Database error when deleting hero: %s", e)
         return False
 
 def save_user_preference(preference_data):
@@ -198,7 +207,7 @@ def save_user_preference(preference_data):
     
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Database error when saving user preference: {str(e)}")
+        logger.error("Database error when saving user preference: %s", e)
         return None
 
 def get_user_preference(preference_id):
@@ -216,5 +225,5 @@ def get_user_preference(preference_id):
         return preference.to_dict() if preference else None
     
     except SQLAlchemyError as e:
-        logger.error(f"Database error when getting user preference: {str(e)}")
+        logger.error("Database error when getting user preference: %s", e)
         return None
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Vectorized Mamdani inference engine for the MLBB hero recommendation system.
+
+The engine runs a compiled ``RulePlan`` and evaluates the whole rule base for
+many heroes at once with NumPy array operations, with the same min/max
+operators and centroid defuzzification as scikit-fuzzy.
+"""
+import numpy as np
+
+
+class BatchFuzzyEngine:
+    """Evaluate a compiled rule plan for a batch of crisp inputs."""
+
+    def __init__(self, plan):
+        """
+        Set up the engine from a compiled plan.
+
+        Args:
+            plan (RulePlan): The rule base, from ``rule_spec.compile_plan``.
+        """
+        self.plan = plan
+        self.inputs = list(plan.inputs)
+        self.output_label = plan.output_label
+        self.output_terms = list(plan.output_terms)
+
+        # Fuzzification table: one column per distinct (input, membership function) pair
+        self._universes = [np.asarray(universe, dtype=np.float64) for universe in plan.universes]
+        self._term_sources = list(plan.term_sources)
+        self._output_universe = np.asarray(plan.output_universe, dtype=np.float64)
+        self._output_mfs = plan.output_mfs
+
+        # Expression nodes in evaluation order, and (node, consequents) rules
+        self._nodes = list(plan.nodes)
+        self._rules = list(plan.rules)
+
+        # Output terms no rule points at have no cut at all and are skipped
+        self._active_outputs = sorted({index for _, consequents in self._rules
+                                       for index, _ in consequents})
+
+    def fuzzify(self, values):
+        """
+        Compute membership degrees for every input term.
+
+        Args:
+            values (np.ndarray): Array of shape (N, len(inputs)).
+
+        Returns:
+            np.ndarray: Array of shape (N, number of input terms).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        memberships = np.empty((values.shape[0], len(self._term_sources)))
+        for column, (input_index, mf) in enumerate(self._term_sources):
+            universe = self._universes[input_index]
+            crisp = np.clip(values[:, input_index], universe[0], universe[-1])
+            memberships[:, column] = np.interp(crisp, universe, mf, left=0.0, right=0.0)
+        return memberships
+
+    @property
+    def universes(self):
+        """Sampled universe of every input, in ``inputs`` order."""
+        return list(self._universes)
+
+    def membership_levels(self):
+        """
+        Collect every membership degree reachable from a sampled input.
+
+        Min/max rule firing never leaves this set, so with unit rule weights
+        the output cuts for on-universe inputs are always drawn from it.
+
+        Returns:
+            np.ndarray: Sorted unique degrees, always including 0.
+        """
+        degrees = [np.zeros(1)] + [mf for _, mf in self._term_sources]
+        return np.unique(np.round(np.concatenate(degrees), 12))
+
+    def sample_memberships(self, indices):
+        """
+        Read membership degrees straight off the sampled universes.
+
+        Args:
+            indices (np.ndarray): Integer array of shape (N, len(inputs))
+                holding positions into each input's universe.
+
+        Returns:
+            np.ndarray: Array of shape (N, number of input terms).
+        """
+        memberships = np.empty((indices.shape[0], len(self._term_sources)))
+        for column, (input_index, mf) in enumerate(self._term_sources):
+            memberships[:, column] = mf[indices[:, input_index]]
+        return memberships
+
+    @property
+    def active_outputs(self):
+        """Indices of the output terms that at least one rule activates."""
+        return list(self._active_outputs)
+
+    def fingerprint(self):
+        """
+        Hash the compiled rule base.
+
+        Returns:
+            str: Hex digest covering inputs, membership functions and rules.
+        """
+        return self.plan.fingerprint
+
+    def activations(self, values):
+        """
+        Compute the accumulated cut of every output term.
+
+        Args:
+            values (np.ndarray): Array of shape (N, len(inputs)).
+
+        Returns:
+            np.ndarray: Array of shape (N, number of output terms).
+        """
+        return self.fire(self.fuzzify(values))
+
+    def fire(self, memberships):
+        """
+        Evaluate the rule base on precomputed membership degrees.
+
+        Args:
+            memberships (np.ndarray): Array of shape (N, number of input terms).
+
+        Returns:
+            np.ndarray: Array of shape (N, number of output terms).
+        """
+        # Every node is evaluated once, after the nodes it reads
+        strengths = []
+        for node in self._nodes:
+            if node[0] == 'term':
+                strengths.append(memberships[:, node[1]])
+            elif node[0] == 'not':
+                strengths.append(1.0 - strengths[node[1]])
+            else:
+                combine = np.fmin if node[0] == 'and' else np.fmax
+                strength = strengths[node[1]]
+                for child in node[2:]:
+                    strength = combine(strength, strengths[child])
+                strengths.append(strength)
+
+        cuts = np.zeros((memberships.shape[0], len(self._output_mfs)))
+        for node, consequents in self._rules:
+            for index, weight in consequents:
+                cuts[:, index] = np.fmax(cuts[:, index], strengths[node] * weight)
+        return cuts
+
+    def defuzzify(self, cuts):
+        """
+        Centroid-defuzzify the clipped and aggregated output sets.
+
+        The output set is sampled on the universe plus every point where a
+        term crosses its cut, exactly as skfuzzy does, and integrated
+        piecewise linearly.
+
+        Args:
+            cuts (np.ndarray): Array of shape (N, number of output terms).
+
+        Returns:
+            np.ndarray: Crisp outputs of shape (N,); NaN where no rule fired.
+        """
+        universe = self._output_universe
+        rows = cuts.shape[0]
+        x0, x1 = universe[:-1], universe[1:]
+
+        # Cut-crossing points per term and segment; non-crossings fall back to
+        # the segment start, and duplicates do not change the integral
+        points = [np.broadcast_to(universe, (rows, universe.size))]
+        for index in self._active_outputs:
+            mf = self._output_mfs[index]
+            cut = cuts[:, index:index + 1]
+            above = np.where(cut == 0.0, mf > cut, mf >= cut)
+            crossing = above[:, 1:] != above[:, :-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                interp = x0 + (cut - mf[:-1]) * (x1 - x0) / (mf[1:] - mf[:-1])
+            points.append(np.where(crossing, interp, x0))
+        x = np.sort(np.concatenate(points, axis=1), axis=1)
+
+        y = np.zeros_like(x)
+        for index in self._active_outputs:
+            clipped = np.minimum(cuts[:, index:index + 1],
+                                 np.interp(x, universe, self._output_mfs[index], left=0.0, right=0.0))
+            np.maximum(y, clipped, out=y)
+
+        dx = np.diff(x, axis=1)
+        ya, yb = y[:, :-1], y[:, 1:]
+        area = 0.5 * dx * (ya + yb)
+        moment = x[:, :-1] * area + dx * dx * (ya + 2.0 * yb) / 6.0
+        total_area = area.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = moment.sum(axis=1) / np.fmax(total_area, np.finfo(float).eps)
+        result[y.sum(axis=1) == 0] = np.nan
+        return result
+
+    def compute(self, values):
+        """
+        Run the full inference pipeline for a batch of inputs.
+
+        Args:
+            values (np.ndarray): Array of shape (N, len(inputs)).
+
+        Returns:
+            np.ndarray: Crisp outputs of shape (N,); NaN where no rule fired.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.inputs):
+            raise ValueError(f"Expected an (N, {len(self.inputs)}) input array")
+        if values.shape[0] == 0:
+            return np.empty(0)
+        return self.defuzzify(self.activations(values))
+
+    def to_array(self, heroes):
+        """
+        Stack hero dictionaries into an input array.
+
+        Args:
+            heroes (list): Hero dictionaries.
+
+        Returns:
+            np.ndarray: Array of shape (len(heroes), len(inputs)).
+        """
+        return np.array([[hero[label] for label in self.inputs] for hero in heroes],
+                        dtype=np.float64).reshape(len(heroes), len(self.inputs))
@@ -1,224 +1,545 @@
 """
 This module contains the fuzzy logic implementation for the MLBB hero recommendation system.
 """
+import os
+import time
+import threading
+from datetime import datetime
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
 import logging
+import rule_spec
+from fuzzy_engine import BatchFuzzyEngine
+from suitability_table import load_suitability_table
+from score_cache import suitability_cache
+from hero_store import HeroStore
+import scoring_pool
+from request_metrics import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Attributes compared against user preferences
+PREFERENCE_ATTRIBUTES = ["damage", "durability", "crowd_control", "mobility", "difficulty"]
+
+# Hero fields weighted by the UserPreference ``*_importance`` columns in
+# weighted scoring, with the (worst, best) values mapped onto 0-100; the
+# statistics use the ranges of their fuzzy antecedents
+IMPORTANCE_SCALES = {
+    "defense_overall": (0, 10),
+    "offense_overall": (0, 10),
+    "skill_effect_overall": (0, 10),
+    "difficulty_overall": (10, 0),
+    "movement_spd": (0, 10),
+    "magic_defense": (0, 10),
+    "mana": (0, 10),
+    "hp_regen": (0, 10),
+    "physical_atk": (0, 10),
+    "physical_defense": (0, 10),
+    "hp": (0, 10),
+    "attack_speed": (0, 10),
+    "mana_regen": (0, 10),
+    "win_rate": (40, 60),
+    "pick_rate": (0, 20),
+    "ban_rate": (0, 20),
+    "profit_factor": (0.5, 2.0),
+    "max_drawdown": (50, 0),
+    "max_consecutive_loss": (10, 0),
+}
+IMPORTANCE_ATTRIBUTES = list(IMPORTANCE_SCALES)
+IMPORTANCE_KEYS = [f"{attr}_importance" for attr in IMPORTANCE_ATTRIBUTES]
+
+# Importance of each basic attribute match in weighted scoring, and of any
+# weight a preference leaves out; both match the UserPreference column default
+BASIC_IMPORTANCE = 5
+DEFAULT_IMPORTANCE = 5
+
+_IMPORTANCE_WORST = np.array([worst for worst, _ in IMPORTANCE_SCALES.values()], dtype=np.float64)
+_IMPORTANCE_RANGE = np.array([best - worst for worst, best in IMPORTANCE_SCALES.values()], dtype=np.float64)
+
+# Resolution preferences are rounded to before evaluation and response caching
+PREFERENCE_STEP = 0.1
+
+# Largest share of a hero list a top-k request may ask for before a full sort is cheaper
+TOP_K_MAX_FRACTION = 0.25
+
+# Rule spec the rule base is compiled from, and how often, in seconds, each
+# process checks it for changes; 0 loads it once and never reloads
+RULE_SPEC_PATH = os.environ.get("RULE_SPEC_PATH", rule_spec.DEFAULT_SPEC_PATH)
+RULE_SPEC_CHECK_INTERVAL = float(os.environ.get("RULE_SPEC_CHECK_INTERVAL", 2))
+
+# The compiled rule base is shared by the whole process; simulations are per thread
+_rule_base = None
+_rule_base_checked = 0.0
+_rule_base_lock = threading.Lock()
+_compute_lock = threading.Lock()
+_local = threading.local()
+
+def quantize_preferences(preferences):
+    """
+    Round preference values to ``PREFERENCE_STEP``.
+    
+    Args:
+        preferences (dict): User preferences for hero attributes.
+        
+    Returns:
+        dict: The same attributes with rounded values.
+    """
+    return {attr: round(round(value / PREFERENCE_STEP) * PREFERENCE_STEP, 6)
+            for attr, value in preferences.items()}
+
+def importance_weights(preferences):
+    """
+    Get the importance weights of a weighted-scoring preference set.
+    
+    Args:
+        preferences (dict): User preferences; weighted scoring is used when
+            any ``*_importance`` key is present, as in ``UserPreference.to_dict``.
+    
+    Returns:
+        np.ndarray: Weight per ``IMPORTANCE_ATTRIBUTES`` entry, missing ones
+        defaulting to ``DEFAULT_IMPORTANCE``; None for equal-weight scoring.
+    """
+    if not preferences or not any(key in preferences for key in IMPORTANCE_KEYS):
+        return None
+    return np.array([preferences.get(key, DEFAULT_IMPORTANCE) for key in IMPORTANCE_KEYS], dtype=np.float64)
+
+def importance_scores(values):
+    """
+    Map raw hero values onto 0-100, 100 being the best end of each scale.
+    
+    Args:
+        values (np.ndarray): Array of shape (heroes, len(IMPORTANCE_ATTRIBUTES)).
+    
+    Returns:
+        np.ndarray: Scores of the same shape; missing values score 0.
+    """
+    scores = np.clip((values - _IMPORTANCE_WORST) / _IMPORTANCE_RANGE, 0, 1) * 100
+    return np.nan_to_num(scores, nan=0.0)
+
+def _importance_matrix(heroes):
+    """``importance_scores`` of a hero list, or of a ``HeroStore`` computed once per store."""
+    if isinstance(heroes, HeroStore):
+        return heroes.derived("importance", lambda store: importance_scores(store.matrix(IMPORTANCE_ATTRIBUTES)))
+    return importance_scores(np.array([[hero.get(attr) for attr in IMPORTANCE_ATTRIBUTES] for hero in heroes],
+                                      dtype=np.float64).reshape(len(heroes), len(IMPORTANCE_ATTRIBUTES)))
+
+def _weighted_match(basic_match_sum, importance, weights):
+    """
+    Combine basic attribute matches and importance-weighted scores.
+    
+    Args:
+        basic_match_sum (np.ndarray): Sum of the basic attribute match % per row.
+        importance (np.ndarray): ``importance_scores`` per row.
+        weights (np.ndarray): Importance weights, per row or shared by all rows.
+    
+    Returns:
+        np.ndarray: Weighted preference match per row.
+    """
+    weights = np.broadcast_to(weights, importance.shape)
+    total = BASIC_IMPORTANCE * len(PREFERENCE_ATTRIBUTES) + weights.sum(axis=1)
+    # Row by row dot product, so one row gives the same result alone or in a batch
+    return (BASIC_IMPORTANCE * basic_match_sum + (importance * weights).sum(axis=1)) / total
+
+class RuleBase:
+    """A compiled rule spec with the batch engine and lookup table built from it."""
+    
+    def __init__(self, plan, source=None, signature=None):
+        """
+        Args:
+            plan (RulePlan): The compiled spec.
+            source (str, optional): Path the spec was read from.
+            signature (tuple, optional): (mtime_ns, size) of the spec file when it was read.
+        """
+        # When this process started scoring with it, naive UTC like catalog timestamps;
+        # anything this process scored with an older rule base was served before
+        self.loaded_at = datetime.utcnow()
+        self.plan = plan
+        self.fingerprint = plan.fingerprint
+        self.engine = BatchFuzzyEngine(plan)
+        self.inputs = self.engine.inputs
+        self.source = source
+        self.signature = signature
+        self._control_system = None
+        self._table = None
+        self._lock = threading.Lock()
+    
+    @property
+    def control_system(self):
+        """scikit-fuzzy control system of the enabled rules, built on first use."""
+        if self._control_system is None:
+            with self._lock:
+                if self._control_system is None:
+                    self._control_system = rule_spec.build_control_system(self.plan)
+        return self._control_system
+    
+    @property
+    def table(self):
+        """Suitability lookup table, loaded on first use or rebuilt if the file is stale."""
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = load_suitability_table(self.engine)
+        return self._table
+
+def _spec_signature(path):
+    """Return the (mtime_ns, size) of a spec file, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+@traced("fuzzy_system")
+def load_rule_base(path=None):
+    """
+    Read and compile a rule spec.
+    
+    Args:
+        path (str, optional): Spec file; ``RULE_SPEC_PATH`` when omitted.
+        
+    Returns:
+        RuleBase: The compiled rule base.
+        
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the spec is invalid.
+    """
+    path = path or RULE_SPEC_PATH
+    signature = _spec_signature(path)
+    return RuleBase(rule_spec.compile_plan(rule_spec.load_spec(path)), path, signature)
+
+def reload_rule_base(force=False):
+    """
+    Recompile the rule spec if its file changed since it was last read.
+    
+    Workers call this themselves every ``RULE_SPEC_CHECK_INTERVAL`` seconds,
+    so an edited spec takes effect without a restart. A spec that fails to
+    compile is logged and the current rule base stays in use.
+    
+    Args:
+        force (bool): Recompile even if the file looks unchanged.
+        
+    Returns:
+        RuleBase: The rule base in use afterwards.
+    """
+    global _rule_base, _rule_base_checked
+    current = _rule_base
+    # Only the first load waits; while a rule base exists one thread checks and the rest carry on
+    if not _rule_base_lock.acquire(blocking=current is None):
+        return current
+    try:
+        current = _rule_base
+        _rule_base_checked = time.monotonic()
+        if current is not None and not force and _spec_signature(RULE_SPEC_PATH) == current.signature:
+            return current
+        try:
+            rule_base = load_rule_base(RULE_SPEC_PATH)
+        except (OSError, ValueError) as e:
+            if current is None:
+                raise
+            logger.error("Keeping rule base %s, could not load %s: %s", current.fingerprint[:12], RULE_SPEC_PATH, e)
+            # Do not retry the broken file until it changes again
+            current.signature = _spec_signature(RULE_SPEC_PATH)
+            return current
+        if current is not None and rule_base.fingerprint == current.fingerprint:
+            # Edits that do not change evaluation, such as reordered rules, keep every cache
+            current.signature = rule_base.signature
+            return current
+        logger.info("Loaded rule base %s from %s: %s", rule_base.fingerprint[:12], RULE_SPEC_PATH,
+                    rule_base.plan.summary())
+        _rule_base = rule_base
+        return rule_base
+    finally:
+        _rule_base_lock.release()
+
+def get_rule_base():
+    """
+    Get the process-wide rule base, compiling the spec on first use.
+    
+    Returns:
+        RuleBase: The current rule base. Callers scoring several batches
+        should hold on to one and pass it along, so a reload mid-request
+        cannot mix scores from two rule bases.
+    """
+    rule_base = _rule_base
+    if rule_base is None:
+        return reload_rule_base()
+    if RULE_SPEC_CHECK_INTERVAL > 0 and time.monotonic() - _rule_base_checked >= RULE_SPEC_CHECK_INTERVAL:
+        return reload_rule_base()
+    return rule_base
+
+def build_control_system():
+    """Build and return a fresh fuzzy control system (rule base) for hero evaluation"""
+    return rule_spec.build_control_system(get_rule_base().plan)
 
-# Create universals for each hero attribute
 def create_fuzzy_system():
-    """Create and return the fuzzy control system for hero evaluation"""
-    
-    # Input variables (basic attributes)
-    damage = ctrl.Antecedent(np.arange(0, 11, 1), 'damage')
-    durability = ctrl.Antecedent(np.arange(0, 11, 1), 'durability')
-    crowd_control = ctrl.Antecedent(np.arange(0, 11, 1), 'crowd_control')
-    mobility = ctrl.Antecedent(np.arange(0, 11, 1), 'mobility')
-    difficulty = ctrl.Antecedent(np.arange(0, 11, 1), 'difficulty')
-    
-    # Input variables (additional attributes)
-    defense_overall = ctrl.Antecedent(np.arange(0, 11, 1), 'defense_overall')
-    offense_overall = ctrl.Antecedent(np.arange(0, 11, 1), 'offense_overall')
-    skill_effect_overall = ctrl.Antecedent(np.arange(0, 11, 1), 'skill_effect_overall')
-    difficulty_overall = ctrl.Antecedent(np.arange(0, 11, 1), 'difficulty_overall')
-    movement_spd = ctrl.Antecedent(np.arange(0, 11, 1), 'movement_spd')
-    magic_defense = ctrl.Antecedent(np.arange(0, 11, 1), 'magic_defense')
-    physical_atk = ctrl.Antecedent(np.arange(0, 11, 1), 'physical_atk')
-    physical_defense = ctrl.Antecedent(np.arange(0, 11, 1), 'physical_defense')
-    
-    # Input variables (statistical attributes)
-    win_rate = ctrl.Antecedent(np.arange(40, 61, 1), 'win_rate')
-    pick_rate = ctrl.Antecedent(np.arange(0, 21, 1), 'pick_rate')
-    ban_rate = ctrl.Antecedent(np.arange(0, 21, 1), 'ban_rate')
-    profit_factor = ctrl.Antecedent(np.arange(0.5, 2.1, 0.1), 'profit_factor')
-    max_drawdown = ctrl.Antecedent(np.arange(0, 51, 1), 'max_drawdown')
-    max_consecutive_loss = ctrl.Antecedent(np.arange(0, 11, 1), 'max_consecutive_loss')
-    
-    # Output variable
-    suitability = ctrl.Consequent(np.arange(0, 101, 1), 'suitability')
-    
-    # Auto-generate fuzzy membership functions for basic attributes
-    damage.automf(3, names=['low', 'medium', 'high'])
-    durability.automf(3, names=['low', 'medium', 'high'])
-    crowd_control.automf(3, names=['low', 'medium', 'high'])
-    mobility.automf(3, names=['low', 'medium', 'high'])
-    difficulty.automf(3, names=['easy', 'medium', 'hard'])
-    
-    # Auto-generate fuzzy membership functions for additional attributes
-    defense_overall.automf(3, names=['low', 'medium', 'high'])
-    offense_overall.automf(3, names=['low', 'medium', 'high'])
-    skill_effect_overall.automf(3, names=['weak', 'medium', 'strong'])
-    difficulty_overall.automf(3, names=['easy', 'medium', 'hard'])
-    movement_spd.automf(3, names=['slow', 'medium', 'fast'])
-    magic_defense.automf(3, names=['low', 'medium', 'high'])
-    physical_atk.automf(3, names=['low', 'medium', 'high'])
-    physical_defense.automf(3, names=['low', 'medium', 'high'])
-    
-    # Define membership functions for statistical attributes
-    win_rate['low'] = fuzz.trimf(win_rate.universe, [40, 45, 50])
-    win_rate['medium'] = fuzz.trimf(win_rate.universe, [45, 50, 55])
-    win_rate['high'] = fuzz.trimf(win_rate.universe, [50, 55, 60])
-    
-    profit_factor['poor'] = fuzz.trimf(profit_factor.universe, [0.5, 0.7, 0.9])
-    profit_factor['average'] = fuzz.trimf(profit_factor.universe, [0.8, 1.0, 1.2])
-    profit_factor['good'] = fuzz.trimf(profit_factor.universe, [1.1, 1.5, 2.0])
-    
-    max_drawdown['small'] = fuzz.trimf(max_drawdown.universe, [0, 15, 25])
-    max_drawdown['medium'] = fuzz.trimf(max_drawdown.universe, [20, 30, 40])
-    max_drawdown['large'] = fuzz.trimf(max_drawdown.universe, [35, 45, 50])
-    
-    max_consecutive_loss['few'] = fuzz.trimf(max_consecutive_loss.universe, [0, 2, 4])
-    max_consecutive_loss['moderate'] = fuzz.trimf(max_consecutive_loss.universe, [3, 5, 7])
-    max_consecutive_loss['many'] = fuzz.trimf(max_consecutive_loss.universe, [6, 8, 10])
-    
-    # Define membership functions for output
-    suitability['low'] = fuzz.trimf(suitability.universe, [0, 0, 50])
-    suitability['medium'] = fuzz.trimf(suitability.universe, [25, 50, 75])
-    suitability['high'] = fuzz.trimf(suitability.universe, [50, 100, 100])
-    
-    # Define fuzzy rules for tank role
-    rule1 = ctrl.Rule(durability['high'] & crowd_control['high'], suitability['high'])
-    rule2 = ctrl.Rule(durability['high'] & crowd_control['medium'], suitability['medium'])
-    rule3 = ctrl.Rule(durability['medium'] & crowd_control['high'], suitability['medium'])
-    rule4 = ctrl.Rule(durability['low'] | crowd_control['low'], suitability['low'])
-    
-    # Define fuzzy rules for fighter role
-    rule5 = ctrl.Rule(damage['medium'] & durability['medium'], suitability['medium'])
-    rule6 = ctrl.Rule(damage['high'] & durability['medium'], suitability['high'])
-    rule7 = ctrl.Rule(damage['medium'] & durability['high'], suitability['high'])
-    rule8 = ctrl.Rule(damage['low'] & durability['low'], suitability['low'])
-    
-    # Define fuzzy rules for assassin role
-    rule9 = ctrl.Rule(damage['high'] & mobility['high'], suitability['high'])
-    rule10 = ctrl.Rule(damage['high'] & mobility['medium'], suitability['medium'])
-    rule11 = ctrl.Rule(damage['medium'] & mobility['high'], suitability['medium'])
-    rule12 = ctrl.Rule(damage['low'] | mobility['low'], suitability['low'])
-    
-    # Define fuzzy rules for mage role
-    rule13 = ctrl.Rule(damage['high'] & crowd_control['medium'], suitability['high'])
-    rule14 = ctrl.Rule(damage['high'] & crowd_control['low'], suitability['medium'])
-    rule15 = ctrl.Rule(damage['medium'] & crowd_control['high'], suitability['high'])
-    rule16 = ctrl.Rule(damage['low'] & crowd_control['low'], suitability['low'])
-    
-    # Define fuzzy rules for marksman role
-    rule17 = ctrl.Rule(damage['high'] & durability['low'], suitability['high'])
-    rule18 = ctrl.Rule(damage['medium'] & mobility['medium'], suitability['medium'])
-    rule19 = ctrl.Rule(damage['high'] & mobility['high'], suitability['high'])
-    rule20 = ctrl.Rule(damage['low'], suitability['low'])
-    
-    # Define fuzzy rules for support role
-    rule21 = ctrl.Rule(crowd_control['high'] & durability['medium'], suitability['high'])
-    rule22 = ctrl.Rule(crowd_control['medium'] & mobility['high'], suitability['high'])
-    rule23 = ctrl.Rule(crowd_control['medium'] & mobility['medium'], suitability['medium'])
-    rule24 = ctrl.Rule(crowd_control['low'] & durability['low'], suitability['low'])
-    
-    # Define general rules for all roles
-    rule25 = ctrl.Rule(difficulty['hard'] & damage['high'], suitability['medium'])
-    rule26 = ctrl.Rule(difficulty['easy'] & mobility['high'], suitability['high'])
-    rule27 = ctrl.Rule(difficulty['medium'] & durability['medium'] & crowd_control['medium'], suitability['medium'])
-    
-    # Define rules for additional attributes
-    rule28 = ctrl.Rule(defense_overall['high'] & physical_defense['high'], suitability['high'])
-    rule29 = ctrl.Rule(offense_overall['high'] & physical_atk['high'], suitability['high'])
-    rule30 = ctrl.Rule(skill_effect_overall['strong'], suitability['high'])
-    rule31 = ctrl.Rule(movement_spd['fast'] & mobility['high'], suitability['high'])
-    rule32 = ctrl.Rule(magic_defense['high'] & physical_defense['high'], suitability['high'])
-    rule33 = ctrl.Rule(defense_overall['low'] & physical_defense['low'], suitability['low'])
-    rule34 = ctrl.Rule(offense_overall['low'] & physical_atk['low'], suitability['low'])
-    rule35 = ctrl.Rule(movement_spd['slow'] & mobility['low'], suitability['low'])
-    
-    # Define rules for statistical factors
-    rule36 = ctrl.Rule(win_rate['high'] & profit_factor['good'], suitability['high'])
-    rule37 = ctrl.Rule(win_rate['high'] & max_drawdown['small'], suitability['high'])
-    rule38 = ctrl.Rule(win_rate['medium'] & profit_factor['average'], suitability['medium'])
-    rule39 = ctrl.Rule(win_rate['low'] & max_drawdown['large'], suitability['low'])
-    rule40 = ctrl.Rule(profit_factor['good'] & max_consecutive_loss['few'], suitability['high'])
-    rule41 = ctrl.Rule(profit_factor['poor'] & max_consecutive_loss['many'], suitability['low'])
-    rule42 = ctrl.Rule(max_drawdown['small'] & max_consecutive_loss['few'], suitability['high'])
-    rule43 = ctrl.Rule(max_drawdown['large'] & max_consecutive_loss['many'], suitability['low'])
-    
-    # Create control system
-    hero_ctrl = ctrl.ControlSystem([
-        rule1, rule2, rule3, rule4, rule5, rule6, rule7, rule8, rule9, rule10,
-        rule11, rule12, rule13, rule14, rule15, rule16, rule17, rule18, rule19, rule20,
-        rule21, rule22, rule23, rule24, rule25, rule26, rule27, rule28, rule29, rule30,
-        rule31, rule32, rule33, rule34, rule35
-    ])
-    
-    return ctrl.ControlSystemSimulation(hero_ctrl)
-
-def evaluate_hero(hero, preferences):
+    """Create and return a simulation over a freshly built fuzzy control system"""
+    from skfuzzy import control as ctrl
+    return ctrl.ControlSystemSimulation(build_control_system())
+
+def get_control_system():
+    """
+    Get the fuzzy control system of the current rule base.
+    
+    Returns:
+        ctrl.ControlSystem: The shared, compiled rule base.
+    """
+    return get_rule_base().control_system
+
+def get_control_inputs():
+    """
+    Get the labels of the inputs consumed by the current rule base.
+    
+    Returns:
+        list: Input labels, sorted by name.
+    """
+    return get_rule_base().inputs
+
+def get_batch_engine():
+    """
+    Get the vectorized engine of the current rule base.
+    
+    Returns:
+        BatchFuzzyEngine: The compiled batch engine.
+    """
+    return get_rule_base().engine
+
+def get_suitability_table():
+    """
+    Get the precomputed suitability table, loading it from disk on first use.
+    
+    Returns:
+        SuitabilityTable: Table matching the current rule base.
+    """
+    return get_rule_base().table
+
+def get_simulation(rules=None):
+    """
+    Get this thread's simulation handle over the shared control system.
+    
+    The handle is created on first use and reused afterwards, until the
+    rule base changes; call ``reset_simulation()`` to drop its cached state.
+    
+    Args:
+        rules (RuleBase, optional): Rule base to simulate; the current one when omitted.
+    
+    Returns:
+        ctrl.ControlSystemSimulation: The thread-local simulation.
+    """
+    rules = rules or get_rule_base()
+    simulation = getattr(_local, "simulation", None)
+    if simulation is None or getattr(_local, "rule_base", None) != rules.fingerprint:
+        from skfuzzy import control as ctrl
+        simulation = ctrl.ControlSystemSimulation(rules.control_system)
+        _local.simulation = simulation
+        _local.rule_base = rules.fingerprint
+    return simulation
+
+def reset_simulation():
+    """Clear the inputs, outputs and cached results of this thread's simulation"""
+    simulation = getattr(_local, "simulation", None)
+    if simulation is not None:
+        with _compute_lock:
+            simulation.reset()
+
+def compute_suitability(hero, rules=None):
+    """
+    Run reference scikit-fuzzy inference for a single hero.
+    
+    Scoring uses the batch engine; this is kept to check it against.
+    
+    Args:
+        hero (dict): The hero data.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        float: Crisp suitability score (0-100).
+    """
+    rules = rules or get_rule_base()
+    hero_eval = get_simulation(rules)
+    
+    # skfuzzy keeps intermediate cuts on the shared Term objects, so inference
+    # over the shared rule base must not interleave between threads
+    with _compute_lock:
+        for label in rules.inputs:
+            hero_eval.input[label] = hero[label]
+        with span("compute"):
+            hero_eval.compute()
+        return hero_eval.output[rules.plan.output_label]
+
+def compute_suitabilities(heroes, rules=None):
+    """
+    Run fuzzy inference for many heroes in one vectorized pass.
+    
+    Args:
+        heroes (list): List of hero dictionaries.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        np.ndarray: Crisp suitability scores; NaN where no rule fired.
+    """
+    rules = rules or get_rule_base()
+    return score_inputs(rules.engine.to_array(heroes), rules)
+
+def score_inputs(values, rules=None):
+    """
+    Score an (N heroes x control inputs) array, using the process pool if enabled.
+    
+    Args:
+        values (np.ndarray): Inputs in ``rules.inputs`` order.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        np.ndarray: Crisp suitability scores; NaN where no rule fired.
+    """
+    rules = rules or get_rule_base()
+    # Large rosters can be sharded across the optional process pool
+    scores = scoring_pool.map_scores(values, rules.fingerprint)
+    if scores is None:
+        scores = score_input_array(values, rules)
+    return scores
+
+def build_hero_store(heroes, rules=None):
+    """
+    Build a columnar hero store with every hero's suitability scored up front.
+    
+    Scores come from the suitability cache where possible, so with a shared
+    cache backend only the first worker to see a hero scores it.
+    
+    Args:
+        heroes (iterable): Hero dictionaries.
+        rules (RuleBase, optional): Rule base to score with; the current one when omitted.
+        
+    Returns:
+        HeroStore: The store; its ``suitability`` is None if batch scoring failed.
+    """
+    store = HeroStore(heroes)
+    try:
+        scores = get_suitabilities(list(store.heroes), rules)
+        store.suitability = np.array(scores, dtype=np.float64).reshape(len(store))
+    except Exception as e:
+        logger.error("Error scoring hero store: %s", e)
+    return store
+
+@traced("compute")
+def score_input_array(values, rules=None):
+    """
+    Score an (N heroes x control inputs) array in this process.
+    
+    Args:
+        values (np.ndarray): Inputs in ``rules.inputs`` order.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        np.ndarray: Crisp suitability scores; NaN where no rule fired.
+    """
+    rules = rules or get_rule_base()
+    # Heroes on the sampled grid come straight from the lookup table
+    scores, hits = rules.table.lookup(values)
+    if not hits.all():
+        scores[~hits] = rules.engine.compute(values[~hits])
+    return scores
+
+def lookup_suitability(hero, rules=None):
+    """
+    Look up a hero's suitability in the precomputed table.
+    
+    Args:
+        hero (dict): The hero data.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        float: Suitability score, or None if the hero is off the table grid.
+    """
+    rules = rules or get_rule_base()
+    scores, hits = rules.table.lookup(rules.engine.to_array([hero]))
+    return scores[0] if hits[0] else None
+
+def get_suitability(hero, rules=None):
+    """
+    Get a hero's suitability, using the score cache and lookup table first.
+    
+    Args:
+        hero (dict): The hero data.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        float: Suitability score; NaN if no rule fired.
+    """
+    rules = rules or get_rule_base()
+    suitability_score = suitability_cache.get(hero, rules.fingerprint)
+    if suitability_score is None:
+        suitability_score = lookup_suitability(hero, rules)
+        if suitability_score is None:
+            suitability_score = float(score_input_array(rules.engine.to_array([hero]), rules)[0])
+        suitability_cache.set(hero, suitability_score, rules.fingerprint)
+    return suitability_score
+
+def get_suitabilities(heroes, rules=None):
+    """
+    Get suitability scores for many heroes, batch-scoring only cache misses.
+    
+    Args:
+        heroes (list): List of hero dictionaries.
+        rules (RuleBase, optional): Rule base to use; the current one when omitted.
+        
+    Returns:
+        list: Suitability scores in the order of ``heroes``.
+    """
+    rules = rules or get_rule_base()
+    scores = suitability_cache.get_many(heroes, rules.fingerprint)
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        computed = compute_suitabilities([heroes[i] for i in missing], rules)
+        for i, score in zip(missing, computed):
+            scores[i] = float(score)
+        suitability_cache.set_many([heroes[i] for i in missing], [scores[i] for i in missing], rules.fingerprint)
+    return scores
+
+@traced("score")
+def evaluate_hero(hero, preferences, suitability_score=None):
     """
     Evaluate a hero using fuzzy logic based on user preferences.
     
     Args:
         hero (dict): The hero data.
         preferences (dict): User preferences for hero attributes.
+        suitability_score (float, optional): Precomputed suitability; taken
+            from the score cache, the lookup table or live inference when omitted.
         
     Returns:
         dict: Evaluation results.
     """
     try:
-        # Create fuzzy control system
-        hero_eval = create_fuzzy_system()
-        
-        # Set inputs for basic attributes
-        hero_eval.input['damage'] = hero["damage"]
-        hero_eval.input['durability'] = hero["durability"]
-        hero_eval.input['crowd_control'] = hero["crowd_control"]
-        hero_eval.input['mobility'] = hero["mobility"]
-        hero_eval.input['difficulty'] = hero["difficulty"]
-        
-        # Set inputs for statistical attributes
-        hero_eval.input['win_rate'] = hero["win_rate"]
-        hero_eval.input['profit_factor'] = hero["profit_factor"]
-        hero_eval.input['max_drawdown'] = hero["max_drawdown"]
-        hero_eval.input['max_consecutive_loss'] = hero["max_consecutive_loss"]
-        
-        # Compute result
-        hero_eval.compute()
-        suitability_score = hero_eval.output['suitability']
+        if suitability_score is None:
+            suitability_score = get_suitability(hero)
+        if np.isnan(suitability_score):
+            raise ValueError("no fuzzy rule fired")
+        suitability_score = float(suitability_score)
         
         # Calculate preference match (weighted by user preferences)
         pref_scores = []
         if preferences:
-            for attr in ["damage", "durability", "crowd_control", "mobility", "difficulty"]:
+            for attr in PREFERENCE_ATTRIBUTES:
                 # Calculate match % by taking the difference and normalizing
                 attr_match = 100 - (abs(preferences[attr] - hero[attr]) / 10 * 100)
                 pref_scores.append(attr_match)
         
         preference_match = sum(pref_scores) / len(pref_scores) if pref_scores else 0
         
-        # Calculate final score as weighted average of suitability and preference match
-        final_score = 0.6 * suitability_score + 0.4 * preference_match
-        
-        # Prepare detailed evaluation results
-        evaluation = {
-            "suitability_score": round(suitability_score, 2),
-            "preference_match": round(preference_match, 2),
-            "final_score": round(final_score, 2),
-            "attributes": {
-                "damage": hero["damage"],
-                "durability": hero["durability"],
-                "crowd_control": hero["crowd_control"],
-                "mobility": hero["mobility"],
-                "difficulty": hero["difficulty"]
-            },
-            "statistics": {
-                "win_rate": hero["win_rate"],
-                "profit_factor": hero["profit_factor"],
-                "max_drawdown": hero["max_drawdown"],
-                "max_consecutive_loss": hero["max_consecutive_loss"]
-            },
-            "strengths": hero["strengths"],
-            "weaknesses": hero["weaknesses"]
-        }
+        # Weighted scoring adds every importance-weighted attribute and statistic
+        weights = importance_weights(preferences)
+        if weights is not None:
+            basic_match_sum = (100 - np.abs(
+                np.array([[preferences[attr] for attr in PREFERENCE_ATTRIBUTES]], dtype=np.float64)
+                - np.array([[hero[attr] for attr in PREFERENCE_ATTRIBUTES]], dtype=np.float64)
+            ) / 10 * 100).sum(axis=1)
+            preference_match = float(_weighted_match(
+                basic_match_sum, _importance_matrix([hero]), weights)[0])
         
-        return evaluation
+        return _evaluation_result(hero, suitability_score, preference_match)
     
     except Exception as e:
-        logging.error(f"Error evaluating hero {hero['name']}: {str(e)}")
+        logger.error("Error evaluating hero %s: %s", hero['name'], e)
         return {
             "error": f"Failed to evaluate hero: {str(e)}",
             "suitability_score": 0,
@@ -226,28 +547,235 @@ def evaluate_hero(hero, preferences):
             "final_score": 0
         }
 
-def get_hero_recommendations(heroes, preferences):
+def _evaluation_result(hero, suitability_score, preference_match):
+    """Build the evaluation dictionary returned by ``evaluate_hero``."""
+    # Calculate final score as weighted average of suitability and preference match
+    final_score = 0.6 * suitability_score + 0.4 * preference_match
+    
+    # Prepare detailed evaluation results
+    return {
+        "suitability_score": round(suitability_score, 2),
+        "preference_match": round(preference_match, 2),
+        "final_score": round(final_score, 2),
+        "attributes": {
+            "damage": hero["damage"],
+            "durability": hero["durability"],
+            "crowd_control": hero["crowd_control"],
+            "mobility": hero["mobility"],
+            "difficulty": hero["difficulty"]
+        },
+        "statistics": {
+            "win_rate": hero["win_rate"],
+            "profit_factor": hero["profit_factor"],
+            "max_drawdown": hero["max_drawdown"],
+            "max_consecutive_loss": hero["max_consecutive_loss"]
+        },
+        "strengths": hero["strengths"],
+        "weaknesses": hero["weaknesses"]
+    }
+
+@traced("score")
+def evaluate_heroes(heroes, preferences_list, suitability_scores=None):
+    """
+    Evaluate many (hero, preferences) pairs in one vectorized pass.
+    
+    Gives the same results as calling ``evaluate_hero`` on each pair.
+    
+    Args:
+        heroes (list): Hero dictionaries.
+        preferences_list (list): User preferences, one per hero.
+        suitability_scores (list, optional): Precomputed suitability per hero;
+            batch-scored through the score cache when omitted.
+    
+    Returns:
+        list: Evaluation results in the order of ``heroes``.
+    """
+    if suitability_scores is None:
+        try:
+            suitability_scores = get_suitabilities(heroes)
+        except Exception as e:
+            logger.error("Error in batch suitability scoring: %s", e)
+            suitability_scores = [None] * len(heroes)
+    
+    # Summed attribute by attribute in the same order as evaluate_hero, so the
+    # rounded scores match exactly
+    count = len(heroes)
+    attributes = np.array([[hero[attr] for attr in PREFERENCE_ATTRIBUTES] for hero in heroes],
+                          dtype=np.float64).reshape(count, len(PREFERENCE_ATTRIBUTES))
+    wanted = np.array([[(preferences or {}).get(attr, 0) for attr in PREFERENCE_ATTRIBUTES]
+                       for preferences in preferences_list],
+                      dtype=np.float64).reshape(count, len(PREFERENCE_ATTRIBUTES))
+    match_sum = (100 - (np.abs(wanted - attributes) / 10 * 100)).sum(axis=1)
+    match = match_sum / len(PREFERENCE_ATTRIBUTES)
+    
+    # Pairs in weighted mode replace the equal-weight match, in one dot-product pass
+    weights = [importance_weights(preferences) for preferences in preferences_list]
+    weighted = [i for i, row_weights in enumerate(weights) if row_weights is not None]
+    if weighted:
+        match[weighted] = _weighted_match(match_sum[weighted],
+                                          _importance_matrix([heroes[i] for i in weighted]),
+                                          np.stack([weights[i] for i in weighted]))
+    
+    evaluations = []
+    for i, (hero, preferences, suitability_score) in enumerate(zip(heroes, preferences_list, suitability_scores)):
+        if suitability_score is None or np.isnan(suitability_score) or not preferences:
+            # Fallbacks and failures take the single-hero path
+            evaluations.append(evaluate_hero(hero, preferences, suitability_score))
+        else:
+            evaluations.append(_evaluation_result(hero, float(suitability_score), float(match[i])))
+    return evaluations
+
+def preference_match_scores(heroes, preferences):
+    """
+    Compute the preference match of many heroes, as in ``evaluate_hero``.
+    
+    Args:
+        heroes (list or HeroStore): Heroes to score.
+        preferences (dict): User preferences for hero attributes.
+        
+    Returns:
+        np.ndarray: Preference match per hero.
+    """
+    if isinstance(heroes, HeroStore):
+        attributes = heroes.matrix(PREFERENCE_ATTRIBUTES)
+    else:
+        attributes = np.array([[hero[attr] for attr in PREFERENCE_ATTRIBUTES] for hero in heroes],
+                              dtype=np.float64).reshape(len(heroes), len(PREFERENCE_ATTRIBUTES))
+    if not preferences:
+        return np.zeros(len(attributes))
+    wanted = np.array([preferences[attr] for attr in PREFERENCE_ATTRIBUTES], dtype=np.float64)
+    match = 100 - np.abs(wanted - attributes) / 10 * 100
+    weights = importance_weights(preferences)
+    if weights is None:
+        return match.mean(axis=1)
+    return _weighted_match(match.sum(axis=1), _importance_matrix(heroes), weights)
+
+def _store_recommendations(store, preferences, top_k):
+    """
+    Rank a ``HeroStore`` over its columns, evaluating only the rows returned.
+    
+    Final scores are estimated with array arithmetic to pick the candidates.
+    The preference match is computed with the same operations as in
+    ``evaluate_hero``, so scores and ordering match the dictionary path exactly.
+    """
+    if top_k is not None and top_k <= 0:
+        return []
+    if store.suitability is None:
+        return get_hero_recommendations(list(store.heroes), preferences)[:top_k]
+    
+    match = preference_match_scores(store, preferences)
+    rows = range(len(store))
+    if top_k is not None and top_k < len(store):
+        # A failed evaluation scores 0
+        estimates = np.nan_to_num(0.6 * store.suitability + 0.4 * match, nan=0.0)
+        # Heroes within rounding distance of the k-th best can still tie or overtake it
+        kth = len(store) - top_k
+        cutoff = np.partition(estimates, kth)[kth] - 0.01
+        rows = np.flatnonzero(estimates >= cutoff).tolist()
+    
+    suitability = store.suitability.tolist()
+    match = match.tolist()
+    recommendations = []
+    for row in rows:
+        hero = store.heroes[row]
+        if preferences and suitability[row] == suitability[row]:
+            evaluation = _evaluation_result(hero, suitability[row], match[row])
+        else:
+            # Failures (NaN suitability) and empty preferences take the single-hero path
+            evaluation = evaluate_hero(hero, preferences, suitability[row])
+        recommendations.append({"hero": hero, "evaluation": evaluation})
+    
+    # Stable sort, so ties keep roster order
+    recommendations.sort(key=lambda x: x["evaluation"]["final_score"], reverse=True)
+    return recommendations[:top_k] if top_k is not None else recommendations
+
+@traced("score")
+def get_hero_recommendations(heroes, preferences, top_k=None):
     """
     Get hero recommendations based on user preferences.
     
     Args:
-        heroes (list): List of heroes to evaluate.
+        heroes (list or HeroStore): Heroes to evaluate; a ``HeroStore`` is
+            ranked over its columns with its precomputed suitability scores.
         preferences (dict): User preferences for hero attributes.
+        top_k (int, optional): Only return the best ``top_k`` recommendations;
+            when that is a small share of the heroes, only the candidates are
+            fully evaluated.
         
     Returns:
         list: Sorted list of hero recommendations.
     """
+    if isinstance(heroes, HeroStore):
+        return _store_recommendations(heroes, preferences, top_k)
+    
+    if top_k is not None and top_k < len(heroes) * TOP_K_MAX_FRACTION:
+        # Every hero is scored either way; the store then evaluates only the candidates
+        return _store_recommendations(build_hero_store(heroes), preferences, top_k)
+    if top_k is not None:
+        return get_hero_recommendations(heroes, preferences)[:max(top_k, 0)]
+    
     recommendations = []
     
-    for hero in heroes:
+    # Score cache misses in one vectorized pass; fall back to per-hero inference
+    try:
+        suitability_scores = get_suitabilities(heroes)
+    except Exception as e:
+        logger.error("Error in batch suitability scoring: %s", e)
+        suitability_scores = [None] * len(heroes)
+    
+    for hero, suitability_score in zip(heroes, suitability_scores):
         try:
-            evaluation = evaluate_hero(hero, preferences)
+            evaluation = evaluate_hero(hero, preferences, suitability_score)
             recommendations.append({
                 "hero": hero,
                 "evaluation": evaluation
             })
         except Exception as e:
-            logging.error(f"Error getting recommendation for {hero['name']}: {str(e)}")
+            logger.error("Error getting recommendation for %s: %s", hero['name'], e)
     
     # Sort recommendations by final score (descending)
     return sorted(recommendations, key=lambda x: x["evaluation"]["final_score"], reverse=True)
+
+@traced("score")
+def score_matrix(heroes, preference_profiles):
+    """
+    Score every hero against every preference profile in one pass.
+    
+    Uses the same formula as ``evaluate_hero``, with the suitability of each
+    hero computed once and shared by all profiles.
+    
+    Args:
+        heroes (list or HeroStore): Heroes to evaluate.
+        preference_profiles (list): List of preference dictionaries.
+        
+    Returns:
+        tuple: (suitability, preference_match, final_score) arrays of shape
+        (heroes,), (heroes, profiles) and (heroes, profiles); suitability is
+        NaN for heroes no rule fired for.
+    """
+    if isinstance(heroes, HeroStore):
+        suitability = heroes.suitability
+        if suitability is None:
+            suitability = np.array(get_suitabilities(list(heroes.heroes)), dtype=np.float64).reshape(len(heroes))
+        attributes = heroes.matrix(PREFERENCE_ATTRIBUTES)
+    else:
+        suitability = np.array(get_suitabilities(heroes) if heroes else [], dtype=np.float64)
+        attributes = np.array([[hero[attr] for attr in PREFERENCE_ATTRIBUTES] for hero in heroes],
+                              dtype=np.float64).reshape(len(heroes), len(PREFERENCE_ATTRIBUTES))
+    preferences = np.array([[profile[attr] for attr in PREFERENCE_ATTRIBUTES] for profile in preference_profiles],
+                           dtype=np.float64).reshape(len(preference_profiles), len(PREFERENCE_ATTRIBUTES))
+    
+    # Match % per attribute is 100 - |preference - attribute| / 10 * 100, averaged
+    preference_match = 100 - np.abs(attributes[:, None, :] - preferences[None, :, :]).mean(axis=2) / 10 * 100
+    
+    # Weighted profiles: (heroes x attributes) scores times (attributes x profiles) weights
+    weights = [importance_weights(profile) for profile in preference_profiles]
+    weighted = [j for j, profile_weights in enumerate(weights) if profile_weights is not None]
+    if weighted:
+        weight_matrix = np.stack([weights[j] for j in weighted], axis=1)
+        total = BASIC_IMPORTANCE * len(PREFERENCE_ATTRIBUTES) + weight_matrix.sum(axis=0)
+        basic_match_sum = preference_match[:, weighted] * len(PREFERENCE_ATTRIBUTES)
+        preference_match[:, weighted] = (BASIC_IMPORTANCE * basic_match_sum
+                                         + _importance_matrix(heroes) @ weight_matrix) / total
+    final_score = 0.6 * suitability[:, None] + 0.4 * preference_match
+    return suitability, preference_match, final_score
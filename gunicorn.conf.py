@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for MLBB Hero Selector.
+
+The app is loaded once in the master, which also builds the fuzzy control
+system, suitability table and hero catalog before forking; workers share
+those pages copy-on-write instead of each paying for them on startup. Set
+``GUNICORN_PRELOAD=0`` when running with ``--reload``, which needs every
+worker to import the code itself.
+
+Run ``flask --app main init-db`` once before starting the server.
+"""
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    """Warm the scoring engine in the master, before any worker is forked."""
+    if preload_app:
+        from main import app
+        from app import warm_up
+        import scoring_pool
+        try:
+            warm_up(app)
+        except Exception as e:
+            server.log.error("Warm-up failed, workers will load lazily: %s", e)
+        # The master never scores again, and workers could not join its pool processes
+        scoring_pool.shutdown(wait=True)
+
+
+def post_fork(server, worker):
+    """Give each worker its own database and cache connections and scoring pool."""
+    if preload_app:
+        from main import app
+        from app import init_worker
+        init_worker(app)
@@ -0,0 +1,193 @@
+"""
+Bulk hero import and export formats for MLBB Hero Selector.
+
+Heroes are exchanged as NDJSON (one hero object per line) or CSV (one hero
+per row, with strengths and weaknesses joined by ``|``). Both directions
+stream, so large rosters never sit in memory at once. From the command line::
+
+    python hero_bulk.py import heroes.ndjson [--upsert]
+    python hero_bulk.py export --format csv > heroes.csv
+"""
+import io
+import sys
+import csv
+import json
+import argparse
+
+FORMATS = ("ndjson", "csv")
+
+# Separator for list fields in CSV cells
+LIST_SEPARATOR = "|"
+LIST_FIELDS = ("strengths", "weaknesses")
+
+# Export column order: identity, then every stored attribute, then lists and metadata
+EXPORT_FIELDS = [
+    "id", "name", "role", "description",
+    "damage", "durability", "crowd_control", "mobility", "difficulty",
+    "defense_overall", "offense_overall", "skill_effect_overall", "difficulty_overall",
+    "movement_spd", "magic_defense", "mana", "hp_regen", "physical_atk",
+    "physical_defense", "hp", "attack_speed", "mana_regen",
+    "win_rate", "pick_rate", "ban_rate", "profit_factor", "max_drawdown", "max_consecutive_loss",
+    "strengths", "weaknesses", "created_at", "updated_at",
+]
+
+
+def read_ndjson(lines):
+    """
+    Parse hero records from NDJSON lines, skipping blank lines.
+
+    Args:
+        lines (iterable): Text lines.
+
+    Yields:
+        dict: One hero record per line.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number}: expected a JSON object")
+        yield record
+
+
+def read_csv(lines):
+    """
+    Parse hero records from CSV lines with a header row.
+
+    Args:
+        lines (iterable): Text lines.
+
+    Yields:
+        dict: One hero record per row, with list fields split.
+    """
+    for row in csv.DictReader(lines):
+        record = {key: value for key, value in row.items() if key}
+        for field in LIST_FIELDS:
+            if field in record:
+                value = record[field]
+                record[field] = [item for item in value.split(LIST_SEPARATOR) if item] if value else []
+        yield record
+
+
+def read_records(lines, fmt):
+    """
+    Parse hero records in the given format.
+
+    Args:
+        lines (iterable): Text lines.
+        fmt (str): One of ``FORMATS``.
+
+    Returns:
+        iterator: Hero records.
+    """
+    if fmt == "ndjson":
+        return read_ndjson(lines)
+    if fmt == "csv":
+        return read_csv(lines)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def write_ndjson(heroes):
+    """
+    Serialize heroes as NDJSON.
+
+    Args:
+        heroes (iterable): Hero dictionaries.
+
+    Yields:
+        str: One line per hero, newline terminated.
+    """
+    for hero in heroes:
+        yield json.dumps(hero) + "\n"
+
+
+def write_csv(heroes, fields=None):
+    """
+    Serialize heroes as CSV with a header row.
+
+    Args:
+        heroes (iterable): Hero dictionaries.
+        fields (list, optional): Columns to write; defaults to ``EXPORT_FIELDS``.
+
+    Yields:
+        str: The header, then one line per hero.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields or EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for hero in heroes:
+        row = dict(hero)
+        for field in LIST_FIELDS:
+            row[field] = LIST_SEPARATOR.join(row.get(field) or [])
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_records(heroes, fmt, fields=None):
+    """
+    Serialize heroes in the given format.
+
+    Args:
+        heroes (iterable): Hero dictionaries.
+        fmt (str): One of ``FORMATS``.
+        fields (list, optional): CSV columns; defaults to ``EXPORT_FIELDS``.
+
+    Returns:
+        iterator: Text chunks.
+    """
+    if fmt == "ndjson":
+        return write_ndjson(heroes)
+    if fmt == "csv":
+        return write_csv(heroes, fields)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def main(argv=None):
+    """Import or export heroes from the command line."""
+    parser = argparse.ArgumentParser(description="Bulk hero import and export")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="load heroes from a file")
+    import_parser.add_argument("path", help="input file, or - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    import_parser.add_argument("--upsert", action="store_true", help="update heroes that already exist by name")
+    export_parser = subparsers.add_parser("export", help="write every hero to stdout")
+    export_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    args = parser.parse_args(argv)
+
+    from main import app
+    from database_manager import bulk_import_heroes, iter_heroes
+
+    with app.app_context():
+        if args.command == "export":
+            for chunk in write_records(iter_heroes(), args.format):
+                sys.stdout.write(chunk)
+            return 0
+
+        fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+        try:
+            result = bulk_import_heroes(read_records(stream, fmt), upsert=args.upsert)
+        except ValueError as e:
+            print(f"Import failed: {e}", file=sys.stderr)
+            return 1
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        if result is None:
+            print("Import failed: database error", file=sys.stderr)
+            return 1
+        print(f"Inserted {result['inserted']} heroes, updated {result['updated']}")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+In-process hero catalog snapshot for MLBB Hero Selector.
+
+The catalog is an immutable, read-optimized copy of the hero table, with a
+columnar ``HeroStore`` of the same rows for the scoring engine. Each
+process keeps one snapshot and swaps in a new one when the catalog version in
+the database moves on; the version is checked at most once per
+``CATALOG_CHECK_INTERVAL`` seconds. A reloaded rule base rescores the current
+snapshot without going back to the database.
+"""
+import os
+import time
+import logging
+import threading
+from types import MappingProxyType
+from sqlalchemy.exc import SQLAlchemyError
+from database import db
+from models import Hero
+from database_manager import get_catalog_version, get_catalog_state
+from fuzzy_logic import build_hero_store, get_rule_base
+from score_cache import catalog_cache
+from request_metrics import traced
+
+logger = logging.getLogger(__name__)
+
+# Seconds between version checks against the database
+CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", 1.0))
+
+_catalog = None
+_checked_at = 0.0
+_refresh_lock = threading.Lock()
+
+
+def catalog_tag(version, updated_at, rule_base=None):
+    """
+    Identify a catalog version across processes and database resets.
+    
+    Args:
+        version (int): Catalog version.
+        updated_at (datetime): When that version was written, or None.
+        rule_base (str, optional): Fingerprint of the rule base scores come from,
+            for keys of anything derived from them.
+        
+    Returns:
+        str: Tag for shared cache keys.
+    """
+    tag = f"{version}@{updated_at.isoformat() if updated_at else ''}"
+    return f"{tag}/{rule_base[:16]}" if rule_base else tag
+
+
+class HeroCatalog:
+    """Immutable snapshot of the hero roster with role and id indexes."""
+
+    def __init__(self, heroes, version, updated_at=None, rules=None):
+        """
+        Args:
+            heroes (list): Hero dictionaries; they must not be mutated afterwards.
+            version (int): Catalog version the snapshot was built from.
+            updated_at (datetime, optional): When that version was written, in UTC.
+            rules (RuleBase, optional): Rule base to score with; the current one when omitted.
+        """
+        self.version = version
+        self.updated_at = updated_at
+        self.rules = rules or get_rule_base()
+        self.rule_base = self.rules.fingerprint
+        self.tag = catalog_tag(version, updated_at, self.rule_base)
+        # Scores change with the catalog or the rule base, whichever changed last
+        self.last_modified = max((t for t in (updated_at, self.rules.loaded_at) if t is not None), default=None)
+        self.heroes = tuple(sorted(heroes, key=lambda hero: hero["id"]))
+        self.roles = tuple(sorted({hero["role"] for hero in self.heroes}))
+
+        by_role = {role: [] for role in self.roles}
+        for hero in self.heroes:
+            by_role[hero["role"]].append(hero)
+        self.by_role = MappingProxyType({role: tuple(heroes) for role, heroes in by_role.items()})
+        self.by_id = MappingProxyType({hero["id"]: hero for hero in self.heroes})
+        self._store = None
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self):
+        """Columnar copy of the roster for scoring, built on first use."""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = build_hero_store(self.heroes, self.rules)
+        return self._store
+
+    def get_hero(self, hero_id):
+        """
+        Get a hero by ID.
+
+        Args:
+            hero_id (int or str): Hero ID to retrieve.
+
+        Returns:
+            dict: Hero dictionary or None if not found.
+        """
+        try:
+            return self.by_id.get(int(hero_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_heroes_by_role(self, role):
+        """
+        Get heroes by role.
+
+        Args:
+            role (str): Hero role to filter by.
+
+        Returns:
+            tuple: Hero dictionaries matching the role.
+        """
+        return self.by_role.get(role, ())
+
+    def __len__(self):
+        return len(self.heroes)
+
+
+@traced("catalog")
+def build_catalog():
+    """
+    Build a catalog snapshot from the database.
+
+    Returns:
+        HeroCatalog: The new snapshot.
+
+    Raises:
+        SQLAlchemyError: If the database could not be read.
+    """
+    # Read the version first so a concurrent write can only make us stale, never skip it
+    version, updated_at = get_catalog_state()
+    # Another worker may already have loaded this version into the shared cache
+    tag = catalog_tag(version, updated_at)
+    heroes = catalog_cache.get(tag)
+    if heroes is None:
+        heroes = [hero.to_dict() for hero in Hero.query_with_details().all()]
+        catalog_cache.set(tag, heroes)
+    return HeroCatalog(heroes, version, updated_at)
+
+
+def refresh_catalog():
+    """
+    Rebuild the catalog and swap it in atomically.
+
+    Returns:
+        HeroCatalog: The new snapshot, or the previous one if the rebuild failed.
+    """
+    global _catalog, _checked_at
+    with _refresh_lock:
+        try:
+            _catalog = build_catalog()
+            _checked_at = time.monotonic()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error when refreshing hero catalog: %s", e)
+        return _catalog if _catalog is not None else HeroCatalog([], None)
+
+
+def _rescore_catalog(rules):
+    """Swap in a copy of the current snapshot scored with another rule base."""
+    global _catalog
+    with _refresh_lock:
+        catalog = _catalog
+        if catalog.rule_base != rules.fingerprint:
+            logger.info("Rescoring hero catalog %s with rule base %s", catalog.version, rules.fingerprint[:12])
+            catalog = _catalog = HeroCatalog(catalog.heroes, catalog.version, catalog.updated_at, rules)
+        return catalog
+
+
+def get_catalog():
+    """
+    Get the current catalog, rebuilding it if the database version or the rule base moved on.
+
+    Returns:
+        HeroCatalog: The current snapshot.
+    """
+    global _checked_at
+    catalog = _catalog
+    if catalog is None:
+        return refresh_catalog()
+
+    rules = get_rule_base()
+    if rules.fingerprint != catalog.rule_base:
+        return _rescore_catalog(rules)
+
+    now = time.monotonic()
+    if now - _checked_at < CHECK_INTERVAL:
+        return catalog
+    _checked_at = now
+
+    try:
+        version = get_catalog_version()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error("Database error when checking hero catalog version: %s", e)
+        return catalog
+    if version != catalog.version:
+        return refresh_catalog()
+    return catalog
@@ -0,0 +1,267 @@
+"""
+Nearest-neighbour hero search for MLBB Hero Selector.
+
+Two KD-trees index the hero roster:
+
+- the attribute profile, every numeric attribute and statistic scaled onto
+  0-1 (statistics over the ranges used by weighted scoring), for "heroes
+  like X" by Euclidean distance;
+- the five basic attributes, for "closest to my sliders" by Manhattan
+  distance, which orders heroes exactly as ``evaluate_hero``'s preference
+  match does.
+
+SciPy trees are static, so heroes added or edited since the last build are
+searched by brute force next to the tree and removed ones are masked out;
+the tree is rebuilt once those changes outgrow ``HERO_INDEX_REBUILD_FRACTION``
+of the roster. The index follows the hero catalog, applying only the heroes
+that changed when a new catalog version appears.
+"""
+import os
+import logging
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+
+from fuzzy_logic import PREFERENCE_ATTRIBUTES, IMPORTANCE_ATTRIBUTES, importance_scores
+from hero_catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+# Changes kept beside the tree, as a fraction of the roster, before it is rebuilt
+REBUILD_FRACTION = float(os.environ.get("HERO_INDEX_REBUILD_FRACTION", 0.1))
+REBUILD_MIN_CHANGES = 32
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def profile_vector(hero):
+    """
+    Scale a hero's attributes and statistics onto 0-1.
+
+    Args:
+        hero (dict): Hero dictionary.
+
+    Returns:
+        np.ndarray: Basic attributes followed by ``IMPORTANCE_ATTRIBUTES``.
+    """
+    basic = np.array([hero[attr] for attr in PREFERENCE_ATTRIBUTES], dtype=np.float64) / 10
+    extra = np.array([[hero.get(attr) for attr in IMPORTANCE_ATTRIBUTES]], dtype=np.float64)
+    return np.concatenate([basic, importance_scores(extra)[0] / 100])
+
+
+def preference_vector(hero):
+    """The hero's basic attributes, on the preference sliders' 0-10 scale."""
+    return np.array([hero[attr] for attr in PREFERENCE_ATTRIBUTES], dtype=np.float64)
+
+
+class VectorIndex:
+    """KD-tree over keyed vectors that takes inserts, updates and removals; not thread-safe."""
+
+    def __init__(self, p=2):
+        """
+        Args:
+            p (int): Minkowski norm of the distance, 2 for Euclidean or 1 for Manhattan.
+        """
+        self.p = p
+        self._tree = None
+        self._tree_keys = []
+        self._tree_vectors = {}
+        self._masked = set()
+        self._pending = {}
+        self._pending_keys = []
+        self._pending_matrix = None
+
+    def __len__(self):
+        return len(self._tree_keys) - len(self._masked) + len(self._pending)
+
+    def rebuild(self, items):
+        """
+        Replace the contents and build a new tree.
+
+        Args:
+            items (iterable): (key, vector) pairs.
+        """
+        items = list(items)
+        self._tree_keys = [key for key, _ in items]
+        self._tree_vectors = {key: vector for key, vector in items}
+        self._tree = cKDTree(np.array([vector for _, vector in items])) if items else None
+        self._masked.clear()
+        self._set_pending({})
+
+    def upsert(self, key, vector):
+        """Add or replace the vector stored under ``key``."""
+        if key in self._tree_vectors:
+            self._masked.add(key)
+        pending = dict(self._pending)
+        pending[key] = vector
+        self._set_pending(pending)
+        self._maybe_rebuild()
+
+    def remove(self, key):
+        """Remove ``key`` if present."""
+        if key in self._tree_vectors:
+            self._masked.add(key)
+        if key in self._pending:
+            pending = dict(self._pending)
+            del pending[key]
+            self._set_pending(pending)
+        self._maybe_rebuild()
+
+    def query(self, vector, k, accept=None):
+        """
+        Find the ``k`` stored vectors nearest to ``vector``.
+
+        Args:
+            vector (np.ndarray): Query vector.
+            k (int): Number of neighbours.
+            accept (callable, optional): Only keys it returns True for are kept.
+
+        Returns:
+            list: (distance, key) pairs, nearest first; ties in key order.
+        """
+        if k <= 0:
+            return []
+        found = []
+        if self._tree is not None:
+            size = len(self._tree_keys)
+            wanted = min(size, k + len(self._masked))
+            while True:
+                distances, rows = self._tree.query(vector, k=wanted, p=self.p)
+                distances, rows = np.atleast_1d(distances), np.atleast_1d(rows)
+                found = [(float(distance), self._tree_keys[row]) for distance, row in zip(distances, rows)
+                         if self._tree_keys[row] not in self._masked
+                         and (accept is None or accept(self._tree_keys[row]))]
+                # Masked or rejected keys may have crowded out enough neighbours
+                if len(found) >= k or wanted == size:
+                    break
+                wanted = min(size, wanted * 2)
+        if self._pending:
+            distances = np.linalg.norm(self._pending_matrix - vector, ord=self.p, axis=1)
+            found.extend((float(distance), key) for distance, key in zip(distances, self._pending_keys)
+                         if accept is None or accept(key))
+        found.sort()
+        return found[:k]
+
+    def _set_pending(self, pending):
+        self._pending = pending
+        self._pending_keys = list(pending)
+        self._pending_matrix = np.array([pending[key] for key in self._pending_keys]) if pending else None
+
+    def _maybe_rebuild(self):
+        changes = len(self._masked) + len(self._pending)
+        if changes > max(REBUILD_MIN_CHANGES, REBUILD_FRACTION * len(self._tree_keys)):
+            items = {key: vector for key, vector in self._tree_vectors.items() if key not in self._masked}
+            items.update(self._pending)
+            self.rebuild(sorted(items.items()))
+
+
+class HeroIndex:
+    """Profile and preference indexes over one hero roster."""
+
+    def __init__(self):
+        self.version = None
+        self.heroes = {}
+        self.profiles = VectorIndex(p=2)
+        self.preferences = VectorIndex(p=1)
+        # Syncs and queries are serialized; both take microseconds for a roster
+        self._lock = threading.Lock()
+
+    def sync(self, catalog):
+        """
+        Bring the index up to date with a catalog, applying only the heroes that changed.
+
+        Args:
+            catalog (HeroCatalog): Catalog to follow.
+
+        Returns:
+            int: Number of heroes added, updated or removed.
+        """
+        with self._lock:
+            if catalog.version == self.version:
+                return 0
+            return self._apply(catalog)
+
+    def _apply(self, catalog):
+        current = catalog.by_id
+        if self.version is None:
+            self.profiles.rebuild((hero_id, profile_vector(hero)) for hero_id, hero in current.items())
+            self.preferences.rebuild((hero_id, preference_vector(hero)) for hero_id, hero in current.items())
+            changes = len(current)
+        else:
+            changes = 0
+            for hero_id in self.heroes.keys() - current.keys():
+                self.profiles.remove(hero_id)
+                self.preferences.remove(hero_id)
+                changes += 1
+            for hero_id, hero in current.items():
+                previous = self.heroes.get(hero_id)
+                if previous == hero:
+                    continue
+                self.profiles.upsert(hero_id, profile_vector(hero))
+                self.preferences.upsert(hero_id, preference_vector(hero))
+                changes += 1
+        self.heroes = dict(current)
+        self.version = catalog.version
+        return changes
+
+    def _accept(self, role, exclude=None):
+        if role is None and exclude is None:
+            return None
+        return lambda hero_id: hero_id != exclude and (role is None or self.heroes[hero_id]["role"] == role)
+
+    def similar(self, hero_id, k, role=None):
+        """
+        Find the heroes whose attribute profiles are closest to a hero's.
+
+        Args:
+            hero_id (int): Hero to compare against; never part of the result.
+            k (int): Number of heroes.
+            role (str, optional): Only return heroes of this role.
+
+        Returns:
+            tuple: (the hero, (distance, hero) pairs nearest first), or None if the hero is unknown.
+        """
+        with self._lock:
+            hero = self.heroes.get(hero_id)
+            if hero is None:
+                return None
+            found = self.profiles.query(profile_vector(hero), k, self._accept(role, exclude=hero_id))
+            return hero, [(distance, self.heroes[key]) for distance, key in found]
+
+    def nearest(self, preferences, k, role=None):
+        """
+        Find the heroes whose basic attributes are closest to the preference sliders.
+
+        Args:
+            preferences (dict): User preferences for hero attributes.
+            k (int): Number of heroes.
+            role (str, optional): Only return heroes of this role.
+
+        Returns:
+            list: (preference match, hero) pairs, best match first.
+        """
+        wanted = np.array([preferences[attr] for attr in PREFERENCE_ATTRIBUTES], dtype=np.float64)
+        with self._lock:
+            found = self.preferences.query(wanted, k, self._accept(role))
+            # The mean of 100 - |preference - attribute| / 10 * 100 over the basic attributes
+            return [(100 - distance / len(PREFERENCE_ATTRIBUTES) * 10, self.heroes[key]) for distance, key in found]
+
+
+def get_hero_index():
+    """
+    Get the process-wide hero index, synced with the current catalog.
+
+    Returns:
+        HeroIndex: The index.
+    """
+    global _index
+    catalog = get_catalog()
+    with _index_lock:
+        if _index is None:
+            _index = HeroIndex()
+    if _index.version != catalog.version:
+        changes = _index.sync(catalog)
+        if changes:
+            logger.debug("Hero index synced to catalog version %s (%d changes)", catalog.version, changes)
+    return _index
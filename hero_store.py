@@ -0,0 +1,151 @@
+"""
+Columnar hero store for MLBB Hero Selector.
+
+Scoring only reads a handful of numeric fields, so the store keeps every
+numeric attribute and statistic as a contiguous NumPy column, with the hero
+IDs and role codes alongside. Hero dictionaries are kept only to build
+responses for the rows that are actually returned.
+"""
+from types import MappingProxyType
+import numpy as np
+
+# Numeric hero fields stored as columns
+NUMERIC_COLUMNS = (
+    "damage", "durability", "crowd_control", "mobility", "difficulty",
+    "defense_overall", "offense_overall", "skill_effect_overall", "difficulty_overall",
+    "movement_spd", "magic_defense", "mana", "hp_regen", "physical_atk",
+    "physical_defense", "hp", "attack_speed", "mana_regen",
+    "win_rate", "pick_rate", "ban_rate", "profit_factor", "max_drawdown", "max_consecutive_loss",
+)
+
+
+class HeroStore:
+    """Read-only columnar copy of a hero roster."""
+
+    def __init__(self, heroes, suitability=None):
+        """
+        Args:
+            heroes (iterable): Hero dictionaries; they must not be mutated afterwards.
+            suitability (np.ndarray, optional): Suitability score per hero, in row order.
+        """
+        self.heroes = tuple(heroes)
+        count = len(self.heroes)
+        self.ids = np.fromiter((hero["id"] for hero in self.heroes), dtype=np.int64, count=count)
+        self.roles = tuple(sorted({hero["role"] for hero in self.heroes}))
+        role_codes = {role: code for code, role in enumerate(self.roles)}
+        self.role_codes = np.fromiter((role_codes[hero["role"]] for hero in self.heroes),
+                                      dtype=np.int32, count=count)
+        # Missing values become NaN
+        self.columns = MappingProxyType({
+            name: np.array([hero.get(name) for hero in self.heroes], dtype=np.float64).reshape(count)
+            for name in NUMERIC_COLUMNS
+        })
+        self.suitability = suitability
+        self._rows = {int(hero_id): row for row, hero_id in enumerate(self.ids)}
+        self._by_role = {}
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.heroes)
+
+    def matrix(self, names):
+        """
+        Stack columns into a contiguous (heroes x names) array.
+
+        Args:
+            names (list): Column names, in output order.
+
+        Returns:
+            np.ndarray: Array of shape (len(self), len(names)).
+        """
+        if not names:
+            return np.empty((len(self), 0))
+        return np.column_stack([self.columns[name] for name in names])
+
+    def derived(self, name, build):
+        """
+        Get an array computed from the store, building it on first use.
+
+        Args:
+            name (str): Cache name of the array.
+            build (callable): Takes the store and returns the array.
+
+        Returns:
+            np.ndarray: The array; it must not be modified.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            value = self._derived.setdefault(name, build(self))
+        return value
+
+    def row_of(self, hero_id):
+        """
+        Get the row index of a hero.
+
+        Args:
+            hero_id (int or str): Hero ID.
+
+        Returns:
+            int: Row index, or None if the hero is not in the store.
+        """
+        try:
+            return self._rows.get(int(hero_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_suitability(self, hero_id):
+        """
+        Get the stored suitability of a hero.
+
+        Args:
+            hero_id (int or str): Hero ID.
+
+        Returns:
+            float: Suitability score (NaN if no rule fired), or None if unknown.
+        """
+        row = self.row_of(hero_id)
+        if row is None or self.suitability is None:
+            return None
+        return float(self.suitability[row])
+
+    def select(self, rows):
+        """
+        Build a store holding a subset of the rows.
+
+        Args:
+            rows (np.ndarray): Row indexes, in the order to keep.
+
+        Returns:
+            HeroStore: The subset.
+        """
+        subset = HeroStore.__new__(HeroStore)
+        rows = np.asarray(rows, dtype=np.intp)
+        subset.heroes = tuple(self.heroes[row] for row in rows)
+        subset.ids = self.ids[rows]
+        subset.roles = self.roles
+        subset.role_codes = self.role_codes[rows]
+        subset.columns = MappingProxyType({name: column[rows] for name, column in self.columns.items()})
+        subset.suitability = self.suitability[rows] if self.suitability is not None else None
+        subset._rows = {int(hero_id): row for row, hero_id in enumerate(subset.ids)}
+        subset._by_role = {}
+        subset._derived = {}
+        return subset
+
+    def for_role(self, role):
+        """
+        Get the heroes of one role, in roster order.
+
+        Args:
+            role (str): Hero role.
+
+        Returns:
+            HeroStore: Store holding only that role; empty for unknown roles.
+        """
+        subset = self._by_role.get(role)
+        if subset is None:
+            if role in self.roles:
+                rows = np.flatnonzero(self.role_codes == self.roles.index(role))
+            else:
+                rows = np.empty(0, dtype=np.intp)
+            subset = self._by_role.setdefault(role, self.select(rows))
+        return subset
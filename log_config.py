@@ -0,0 +1,158 @@
+"""
+Logging setup for MLBB Hero Selector.
+
+``configure_logging`` routes every record through a queue to a background
+thread, which formats it and writes it to stderr. Request threads only pay
+for the level check, and for rendering the message of records that pass it.
+Log calls pass their arguments separately, ``logger.error("... %s", e)``,
+so disabled levels cost no formatting at all.
+
+Records are written as one JSON object per line by default, with any
+``extra`` fields included; set ``LOG_FORMAT=text`` for plain lines.
+``LOG_LEVEL`` sets the root level, and ``LOG_LEVELS`` overrides single
+loggers::
+
+    LOG_LEVEL=WARNING LOG_LEVELS=hero_catalog=DEBUG,sqlalchemy.engine=INFO
+"""
+import os
+import sys
+import json
+import atexit
+import logging
+import threading
+from queue import SimpleQueue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+
+# Levels applied before LOG_LEVELS; SQLAlchemy logs every statement at INFO
+DEFAULT_LEVELS = {
+    "sqlalchemy": "WARNING",
+}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler leaving all formatting, tracebacks included, to the listener thread."""
+
+    def prepare(self, record):
+        # Only the message is rendered here, since its arguments may change once the
+        # call returns. The record is not copied: this is the root logger's only handler
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def parse_levels(spec):
+    """
+    Parse per-logger levels.
+
+    Args:
+        spec (str): Comma-separated ``logger=LEVEL`` pairs.
+
+    Returns:
+        dict: Level names by logger name.
+
+    Raises:
+        ValueError: If a pair is malformed or names an unknown level.
+    """
+    levels = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, level = item.partition("=")
+        level = level.strip().upper()
+        if not separator or not name.strip() or not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid logger level: {item}")
+        levels[name.strip()] = level
+    return levels
+
+
+def _formatter():
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def _start_listener():
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_formatter())
+    _handler.queue = SimpleQueue()
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The listener thread is not copied into a forked child
+    if _handler is not None:
+        _start_listener()
+
+
+def stop_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def configure_logging(level=None, levels=None):
+    """
+    Install the queue handler on the root logger and set logger levels.
+
+    Safe to call more than once; later calls only change the levels.
+
+    Args:
+        level (str, optional): Root level; ``LOG_LEVEL`` when omitted.
+        levels (dict, optional): Extra level names by logger name, applied
+            after ``DEFAULT_LEVELS`` and ``LOG_LEVELS``.
+    """
+    global _handler
+    with _lock:
+        root = logging.getLogger()
+        if _handler is None:
+            _handler = _DeferredQueueHandler(SimpleQueue())
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(_handler)
+            _start_listener()
+            atexit.register(stop_logging)
+            os.register_at_fork(after_in_child=_restart_after_fork)
+        root.setLevel(level or LOG_LEVEL)
+        for name, logger_level in {**DEFAULT_LEVELS, **parse_levels(LOG_LEVELS), **(levels or {})}.items():
+            logging.getLogger(name).setLevel(logger_level)
@@ -1,4 +1,9 @@
-from app import app
+from app import create_app, init_db
+
+app = create_app()
 
 if __name__ == "__main__":
+    # The development server sets up its own database
+    with app.app_context():
+        init_db()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -2,7 +2,37 @@
 Database models for MLBB Hero Selector.
 """
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from database import db
+from request_metrics import traced
+
+# Named column sets for hero listings; "full" is everything in Hero.to_dict()
+HERO_PROJECTIONS = {
+    "summary": ("id", "name", "role"),
+    "scoring": (
+        "id", "name", "role",
+        "damage", "durability", "crowd_control", "mobility", "difficulty",
+        "defense_overall", "offense_overall", "skill_effect_overall", "difficulty_overall",
+        "movement_spd", "magic_defense", "mana", "hp_regen", "physical_atk",
+        "physical_defense", "hp", "attack_speed", "mana_regen",
+        "win_rate", "pick_rate", "ban_rate", "profit_factor", "max_drawdown", "max_consecutive_loss",
+    ),
+    "full": None,
+}
+
+def project_hero(hero, projection):
+    """
+    Reduce a hero dictionary to a named projection.
+    
+    Args:
+        hero (dict): Full hero dictionary.
+        projection (str): Key of ``HERO_PROJECTIONS``.
+        
+    Returns:
+        dict: The projected hero; the same dictionary for ``full``.
+    """
+    columns = HERO_PROJECTIONS[projection]
+    return hero if columns is None else {name: hero[name] for name in columns}
 
 class Hero(db.Model):
     """Hero model for storing hero data."""
@@ -54,6 +84,12 @@ class Hero(db.Model):
     def __repr__(self):
         return f"<Hero(name='{self.name}', role='{self.role}')>"
     
+    @classmethod
+    def query_with_details(cls):
+        """Query heroes with strengths and weaknesses loaded in bulk, one query each."""
+        return cls.query.options(selectinload(cls.strengths), selectinload(cls.weaknesses))
+    
+    @traced("to_dict")
     def to_dict(self):
         """Convert hero object to dictionary."""
         return {
@@ -132,6 +168,18 @@ class HeroWeakness(db.Model):
         return f"<HeroWeakness(hero_id={self.hero_id}, text='{self.text}')>"
 
 
+class CatalogState(db.Model):
+    """Model for tracking the version of the hero catalog."""
+    __tablename__ = 'catalog_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CatalogState(version={self.version})>"
+
+
 class UserPreference(db.Model):
     """Model for storing user preferences."""
     __tablename__ = 'user_preferences'
@@ -214,4 +262,24 @@ class UserPreference(db.Model):
             
             # Metadata
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+
+class ProfileRanking(db.Model):
+    """Model for storing the precomputed rankings of a saved preference profile."""
+    __tablename__ = 'profile_rankings'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    preference_id = db.Column(db.Integer, db.ForeignKey('user_preferences.id', ondelete='CASCADE'),
+                              nullable=False, unique=True)
+    # Catalog version the rankings were computed from
+    catalog_version = db.Column(db.Integer, nullable=False)
+    # Fingerprint of the rule base that scored them
+    rule_base = db.Column(db.String(64), nullable=False)
+    # JSON object mapping each role to its ranked [{"hero_id", "evaluation"}] list
+    rankings = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return (f"<ProfileRanking(preference_id={self.preference_id}, catalog_version={self.catalog_version}, "
+                f"rule_base={self.rule_base})>")
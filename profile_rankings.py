@@ -0,0 +1,187 @@
+"""
+Precomputed rankings for saved preference profiles.
+
+Each saved profile is ranked against every role and the rankings are stored
+with the catalog version and rule base they were computed from. A background
+thread brings stale rankings up to date when a profile is saved or the
+catalog or rule base moves on, so
+loading a profile normally reads its rankings instead of scoring heroes.
+
+The thread is woken by ``notify`` after writes in this process, and polls
+every ``PROFILE_REFRESH_INTERVAL`` seconds to pick up writes made by other
+processes. Set ``PROFILE_RANKING_WORKER=0`` to run without it; rankings are
+then computed when a stale profile is loaded.
+"""
+import os
+import logging
+import threading
+
+from fuzzy_logic import get_hero_recommendations, PREFERENCE_ATTRIBUTES, IMPORTANCE_KEYS
+from hero_catalog import get_catalog
+from database_manager import get_profile_rankings, save_profile_rankings, get_stale_profiles
+
+logger = logging.getLogger(__name__)
+
+# Preference fields of a saved profile used for scoring; the importance weights
+# make saved profiles rank with weighted scoring
+PROFILE_FIELDS = PREFERENCE_ATTRIBUTES + IMPORTANCE_KEYS
+
+WORKER_ENABLED = os.environ.get("PROFILE_RANKING_WORKER", "1") != "0"
+
+# Seconds between checks for rankings made stale by other processes
+REFRESH_INTERVAL = float(os.environ.get("PROFILE_REFRESH_INTERVAL", 30))
+
+# Profiles ranked per database round trip
+REFRESH_BATCH_SIZE = int(os.environ.get("PROFILE_REFRESH_BATCH_SIZE", 100))
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def profile_preferences(profile):
+    """
+    Get the scoring preferences of a saved profile.
+
+    Args:
+        profile (dict): Preference dictionary from ``UserPreference.to_dict``.
+
+    Returns:
+        dict: Preference values and importance weights as floats.
+    """
+    return {field: float(profile[field]) for field in PROFILE_FIELDS}
+
+
+def rank_profile(catalog, profile):
+    """
+    Rank every role of a catalog for a saved profile.
+
+    Args:
+        catalog (HeroCatalog): Catalog to rank.
+        profile (dict): Preference dictionary.
+
+    Returns:
+        dict: Ranked ``{"hero_id", "evaluation"}`` lists by role.
+    """
+    preferences = profile_preferences(profile)
+    return {
+        role: [{"hero_id": recommendation["hero"]["id"], "evaluation": recommendation["evaluation"]}
+               for recommendation in get_hero_recommendations(catalog.store.for_role(role), preferences)]
+        for role in catalog.roles
+    }
+
+
+def load_rankings(catalog, profile):
+    """
+    Get the rankings of a saved profile for a catalog.
+
+    Stored rankings are used when they match the catalog version and rule base; otherwise
+    they are computed here and the background refresh is woken to store them.
+
+    Args:
+        catalog (HeroCatalog): Current catalog.
+        profile (dict): Preference dictionary.
+
+    Returns:
+        tuple: (rankings by role, whether they were precomputed).
+    """
+    stored = get_profile_rankings(profile["id"])
+    if stored is not None and stored[:2] == (catalog.version, catalog.rule_base):
+        return stored[2], True
+    notify()
+    return rank_profile(catalog, profile), False
+
+
+def refresh_stale_rankings(limit=REFRESH_BATCH_SIZE):
+    """
+    Rank and store up to ``limit`` profiles whose rankings are out of date.
+
+    Must run inside an application context.
+
+    Returns:
+        int: Number of profiles whose rankings were stored.
+    """
+    catalog = get_catalog()
+    if catalog.version is None:
+        return 0
+    stored = 0
+    for profile in get_stale_profiles(catalog.version, catalog.rule_base, limit):
+        if save_profile_rankings(profile["id"], catalog.version, catalog.rule_base, rank_profile(catalog, profile)):
+            stored += 1
+        else:
+            # Most likely another process stored the same rankings first
+            logger.warning("Could not store rankings of profile %s", profile["id"])
+    return stored
+
+
+class RankingWorker:
+    """Background thread keeping stored profile rankings up to date."""
+
+    def __init__(self, app, interval=REFRESH_INTERVAL, batch_size=REFRESH_BATCH_SIZE):
+        """
+        Args:
+            app (Flask): Application providing the database context.
+            interval (float): Seconds between polls when not notified.
+            batch_size (int): Profiles ranked per database round trip.
+        """
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-rankings", daemon=True)
+
+    def start(self):
+        """Start the thread, with an immediate first refresh."""
+        self._wake.set()
+        self._thread.start()
+
+    def notify(self):
+        """Ask for a refresh as soon as possible."""
+        self._wake.set()
+
+    def stop(self):
+        """Stop the thread after the current refresh."""
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                with self.app.app_context():
+                    # A full batch means more profiles may be waiting
+                    while (refresh_stale_rankings(self.batch_size) == self.batch_size
+                           and not self._stopped.is_set()):
+                        pass
+            except Exception as e:
+                logger.error("Error refreshing profile rankings: %s", e)
+
+
+def start_worker(app):
+    """
+    Start the background refresh for this process, once.
+
+    Args:
+        app (Flask): Application providing the database context.
+
+    Returns:
+        RankingWorker: The worker, or None if disabled with ``PROFILE_RANKING_WORKER=0``.
+    """
+    global _worker
+    if not WORKER_ENABLED or _worker is not None:
+        return _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = RankingWorker(app)
+            _worker.start()
+    return _worker
+
+
+def notify():
+    """Wake the background refresh, if running, after a profile or hero write."""
+    if _worker is not None:
+        _worker.notify()
@@ -0,0 +1,137 @@
+"""
+Query counting helpers for MLBB Hero Selector.
+
+Use ``count_queries`` to measure how many SQL statements a block issues and
+``assert_max_queries`` to fail when it issues more than expected. Running this
+module checks the hero read paths in ``database_manager`` against an in-memory
+SQLite database::
+
+    python query_counter.py
+"""
+import sys
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Collects the SQL statements executed on an engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        """Number of statements executed so far."""
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    Count the statements executed on ``engine`` inside the block.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to watch.
+
+    Yields:
+        QueryCounter: Counter filled in while the block runs.
+    """
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._record)
+
+
+@contextmanager
+def assert_max_queries(engine, limit):
+    """
+    Fail if the block executes more than ``limit`` statements on ``engine``.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine to watch.
+        limit (int): Maximum number of statements allowed.
+
+    Yields:
+        QueryCounter: Counter filled in while the block runs.
+
+    Raises:
+        AssertionError: If the limit was exceeded.
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(counter.statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{statements}")
+
+
+# Read paths and the number of statements each may issue, independent of roster size
+READ_PATH_BUDGETS = {
+    "get_all_heroes": 3,
+    "get_heroes_by_role": 3,
+    "get_hero_by_id": 3,
+    "get_all_roles": 1,
+    "get_all_heroes.summary": 1,
+    "get_heroes_by_role.scoring": 1,
+    "get_hero_by_id.summary": 1,
+    "get_profile_rankings": 1,
+    "get_stale_profiles": 1,
+}
+
+
+def check_read_paths():
+    """
+    Seed an in-memory database and check every read path stays on budget.
+
+    Returns:
+        dict: Statements issued per read path.
+
+    Raises:
+        AssertionError: If a read path exceeds its budget.
+    """
+    from flask import Flask
+    from database import db
+    import database_manager
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    calls = {
+        "get_all_heroes": ("get_all_heroes", ()),
+        "get_heroes_by_role": ("get_heroes_by_role", ("Tank",)),
+        "get_hero_by_id": ("get_hero_by_id", (1,)),
+        "get_all_roles": ("get_all_roles", ()),
+        "get_all_heroes.summary": ("get_all_heroes", ("summary",)),
+        "get_heroes_by_role.scoring": ("get_heroes_by_role", ("Tank", "scoring")),
+        "get_hero_by_id.summary": ("get_hero_by_id", (1, "summary")),
+        "get_profile_rankings": ("get_profile_rankings", (1,)),
+        "get_stale_profiles": ("get_stale_profiles", (0, "", 100)),
+    }
+    counts = {}
+    with app.app_context():
+        db.create_all()
+        database_manager.create_initial_data()
+        for name, (function, args) in calls.items():
+            # Start from an empty identity map so nothing is served from memory
+            db.session.expunge_all()
+            with assert_max_queries(db.engine, READ_PATH_BUDGETS[name]) as counter:
+                getattr(database_manager, function)(*args)
+            counts[name] = counter.count
+    return counts
+
+
+def main():
+    """Run the read path check and report the statement counts."""
+    for name, count in check_read_paths().items():
+        print(f"{name}: {count} queries (budget {READ_PATH_BUDGETS[name]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Single-flight request coalescing and micro-batching for asyncio servers.
+
+Concurrent submissions with the same key share one result. Distinct keys
+that arrive within ``max_delay`` seconds of each other are collected into one
+batch and handed to a synchronous batch function on a worker thread, so
+blocking database reads and scoring never run on the event loop.
+"""
+import os
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Largest batch handed to the batch function at once
+MAX_BATCH_SIZE = int(os.environ.get("EVALUATION_BATCH_SIZE", 256))
+
+# Seconds the first request of a batch waits for others to join it
+MAX_DELAY = float(os.environ.get("EVALUATION_BATCH_DELAY", 0.002))
+
+
+class CoalescingBatcher:
+    """Coalesce identical requests and batch distinct ones."""
+
+    def __init__(self, batch_function, max_batch_size=MAX_BATCH_SIZE, max_delay=MAX_DELAY, executor=None):
+        """
+        Args:
+            batch_function (callable): Takes a list of items and returns one
+                result per item, in order; a result may be an exception.
+            max_batch_size (int): Flush as soon as this many items are pending.
+            max_delay (float): Seconds to wait for a batch to fill.
+            executor (Executor, optional): Where the batch function runs;
+                the event loop's default executor when omitted.
+        """
+        self.batch_function = batch_function
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.executor = executor
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._inflight = {}
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, key, item):
+        """
+        Get the result for ``item``, sharing it with concurrent submissions of ``key``.
+
+        Args:
+            key (hashable): Identifies requests that have the same result.
+            item: Passed to the batch function.
+
+        Returns:
+            The batch function's result for the item.
+
+        Raises:
+            Exception: Whatever the batch function raised or returned for the item.
+        """
+        self.submitted += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # Mark the outcome as retrieved even if every waiter gave up
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = future
+            self._pending.append((key, item, future))
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_delay, self._flush)
+        # A cancelled waiter must not cancel the result the others are waiting for
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        """Hand every pending item to the batch function."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        """Run one batch on the executor and resolve its futures."""
+        self.batches += 1
+        loop = asyncio.get_running_loop()
+        items = [item for _, item, _ in batch]
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_function, items)
+        except Exception as e:
+            logger.error("Batch of %d requests failed: %s", len(batch), e)
+            results = [e] * len(batch)
+
+        for (key, _, future), result in zip(batch, results):
+            # Later identical requests start a fresh computation
+            self._inflight.pop(key, None)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,382 @@
+"""
+Request tracing and Prometheus metrics for MLBB Hero Selector.
+
+Every request's latency is recorded in a histogram per route. A sampled
+fraction of requests (``TRACE_SAMPLE_RATE``, or any request sent with an
+``X-Trace`` header) is also traced: ``span`` blocks and ``traced`` functions
+along the hot path time their stage, SQL statements are counted and timed,
+and the response carries a ``Server-Timing`` header with the breakdown::
+
+    Server-Timing: db;desc="3 queries";dur=1.8, score;dur=0.4, render;dur=2.1, total;dur=5.2
+
+Stage times are inclusive: a query issued while serializing a hero counts
+towards both ``db`` and ``to_dict``. Untraced requests only pay for one
+context variable lookup per span.
+
+``/metrics`` serves the histograms in the Prometheus text format. Each
+process keeps its own, so scrape every worker or run a single one.
+
+Flask and SQLAlchemy are only imported by ``init_app``, so the scoring code
+can be instrumented without slowing down scoring pool processes.
+"""
+import os
+import time
+import random
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+# Fraction of requests traced, from 0 (only those asking with TRACE_HEADER) to 1
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0))
+
+# Request header forcing a trace of that request
+TRACE_HEADER = "X-Trace"
+
+# Histogram bucket bounds, in seconds for latencies
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Route label of requests no URL rule matched
+UNMATCHED_ROUTE = "<unmatched>"
+
+_current = ContextVar("request_trace", default=None)
+
+
+class Histogram:
+    """Prometheus histogram with a fixed set of label names."""
+
+    def __init__(self, name, documentation, label_names, buckets):
+        """
+        Args:
+            name (str): Metric name.
+            documentation (str): HELP text.
+            label_names (tuple): Names of the labels, in the order values are passed.
+            buckets (tuple): Increasing upper bounds; ``+Inf`` is added.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        """
+        Record one observation.
+
+        Args:
+            labels (tuple): Label values, in ``label_names`` order.
+            value (float): Observed value.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        """
+        Render the histogram in the Prometheus text format.
+
+        Returns:
+            list: Lines of text.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count])
+                            for labels, (counts, total, count) in self._series.items())
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total, count) in series:
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                separator = "," if label_text else ""
+                lines.append(f'{self.name}_bucket{{{label_text}{separator}le="{bound}"}} {cumulative}')
+            suffix = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+    def clear(self):
+        """Drop every observation."""
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value))
+
+
+REQUEST_DURATION = Histogram(
+    "hero_selector_request_duration_seconds", "Time to handle a request, by route.",
+    ("route", "method"), LATENCY_BUCKETS)
+STAGE_DURATION = Histogram(
+    "hero_selector_stage_duration_seconds", "Time spent in each stage of traced requests, by route.",
+    ("route", "stage"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    "hero_selector_request_queries", "SQL statements executed by traced requests, by route.",
+    ("route",), QUERY_COUNT_BUCKETS)
+
+METRICS = (REQUEST_DURATION, STAGE_DURATION, REQUEST_QUERIES)
+
+
+class Trace:
+    """Stage timings and SQL statement count of one traced request."""
+
+    __slots__ = ("stages", "queries", "_open", "_query_started")
+
+    def __init__(self):
+        self.stages = {}
+        self.queries = 0
+        self._open = {}
+        self._query_started = None
+
+    def add(self, stage, seconds):
+        """Add ``seconds`` to a stage."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def begin(self, stage):
+        """
+        Start timing a stage.
+
+        Returns:
+            bool: False if the stage is already being timed, so nested
+            occurrences are not counted twice.
+        """
+        if stage in self._open:
+            return False
+        self._open[stage] = time.perf_counter()
+        return True
+
+    def end(self, stage):
+        """Stop timing a stage started with ``begin``."""
+        started = self._open.pop(stage, None)
+        if started is not None:
+            self.add(stage, time.perf_counter() - started)
+
+    def server_timing(self, total):
+        """
+        Format the ``Server-Timing`` header value.
+
+        Args:
+            total (float): Seconds the whole request took.
+
+        Returns:
+            str: Header value, in milliseconds.
+        """
+        entries = []
+        for stage, seconds in self.stages.items():
+            description = f';desc="{self.queries} queries"' if stage == "db" else ""
+            entries.append(f"{stage}{description};dur={seconds * 1000:.2f}")
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+
+class _Span:
+    __slots__ = ("trace", "stage", "active")
+
+    def __init__(self, trace, stage):
+        self.trace = trace
+        self.stage = stage
+        self.active = False
+
+    def __enter__(self):
+        self.active = self.trace.begin(self.stage)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.active:
+            self.trace.end(self.stage)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current_trace():
+    """Return the trace of the request being handled, or None if it is not traced."""
+    return _current.get()
+
+
+def span(stage):
+    """
+    Time a block as a stage of the current trace; does nothing when untraced.
+
+    Args:
+        stage (str): Stage name, as shown in ``Server-Timing``.
+
+    Returns:
+        A context manager.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, stage)
+
+
+def traced(stage):
+    """
+    Decorator timing every call of a function as a stage of the current trace.
+
+    Args:
+        stage (str): Stage name, as shown in ``Server-Timing``.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None or not trace.begin(stage):
+                return function(*args, **kwargs)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                trace.end(stage)
+        return wrapper
+    return decorator
+
+
+def start_trace():
+    """
+    Start tracing the work done in the current context.
+
+    Returns:
+        tuple: (the trace, token for ``finish_trace``).
+    """
+    trace = Trace()
+    return trace, _current.set(trace)
+
+
+def finish_trace(token):
+    """Stop tracing, restoring the context from before ``start_trace``."""
+    _current.reset(token)
+
+
+def observe_request(route, method, seconds, trace=None):
+    """
+    Record a handled request.
+
+    Args:
+        route (str): Route pattern, such as ``/api/heroes/<int:hero_id>``.
+        method (str): HTTP method.
+        seconds (float): Time taken.
+        trace (Trace, optional): The request's trace, if it was traced.
+    """
+    REQUEST_DURATION.observe((route, method), seconds)
+    if trace is not None:
+        for stage, stage_seconds in trace.stages.items():
+            STAGE_DURATION.observe((route, stage), stage_seconds)
+        REQUEST_QUERIES.observe((route,), trace.queries)
+
+
+def render_metrics():
+    """
+    Render every metric in the Prometheus text format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    if trace is not None:
+        trace.queries += 1
+        trace._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    if trace is not None and trace._query_started is not None:
+        trace.add("db", time.perf_counter() - trace._query_started)
+        trace._query_started = None
+
+
+def _before_render(sender, template, context, **extra):
+    trace = _current.get()
+    if trace is not None:
+        trace.begin("render")
+
+
+def _after_render(sender, template, context, **extra):
+    trace = _current.get()
+    if trace is not None:
+        trace.end("render")
+
+
+def _start_request():
+    from flask import g, request
+
+    g.request_started = time.perf_counter()
+    g.request_trace = None
+    if request.headers.get(TRACE_HEADER) or (TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE):
+        g.request_trace, g.request_trace_token = start_trace()
+
+
+def _finish_request(response):
+    from flask import g, request
+
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    trace = g.get("request_trace")
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing(elapsed)
+    route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+    observe_request(route, request.method, elapsed, trace)
+    return response
+
+
+def _teardown_request(exc):
+    from flask import g
+
+    token = g.pop("request_trace_token", None)
+    if token is not None:
+        finish_trace(token)
+
+
+def init_app(app):
+    """
+    Time every request of a Flask app and trace the sampled ones.
+
+    SQL statements are counted on every SQLAlchemy engine, so this only
+    needs calling once per app.
+
+    Args:
+        app (Flask): The application.
+    """
+    from flask import before_render_template, template_rendered
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
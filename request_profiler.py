@@ -0,0 +1,236 @@
+"""
+Opt-in cProfile sampling of production requests for MLBB Hero Selector.
+
+With ``REQUEST_PROFILING=1`` a request is profiled when it is sent with an
+``X-Profile`` header, or picked at random with ``PROFILE_SAMPLE_RATE``.
+Profiles are rate limited to ``PROFILE_MAX_PER_MINUTE`` per process and one
+at a time, so a burst of flagged requests cannot slow down a worker. Set
+``PROFILE_ENDPOINTS`` to limit profiling to some views, for example
+``hero_selector.evaluate,hero_selector.api_evaluate_hero``.
+
+Each profile is written to ``PROFILE_DIR`` as a pstats file next to a JSON
+description of the request, and only the newest ``PROFILE_KEEP`` are kept.
+``/admin/profiles`` lists them and ``/admin/profiles/<name>`` downloads one,
+as pstats for ``snakeviz`` or ``python -m pstats``, or with ``format=text``
+as the top functions by cumulative time.
+"""
+import io
+import os
+import json
+import time
+import random
+import pstats
+import logging
+import cProfile
+import tempfile
+import threading
+from datetime import datetime, timezone
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("REQUEST_PROFILING", "0") == "1"
+
+# Fraction of requests profiled besides those sent with PROFILE_HEADER
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+
+# Request header asking for a profile of that request
+PROFILE_HEADER = "X-Profile"
+
+# Most profiles taken per process per minute, whatever asked for them
+MAX_PER_MINUTE = int(os.environ.get("PROFILE_MAX_PER_MINUTE", 6))
+
+# Comma-separated endpoint names that may be profiled; empty for all
+ENDPOINTS = frozenset(name for name in os.environ.get("PROFILE_ENDPOINTS", "").split(",") if name)
+
+# Where profiles are written, shared by every worker, and how many are kept
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "hero_selector_profiles"))
+KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+
+# Functions listed by the text download
+TEXT_LIMIT = 60
+
+_PROFILE_SUFFIX = ".prof"
+_META_SUFFIX = ".json"
+
+# cProfile cannot profile two threads of a process at once
+_active = threading.Lock()
+_taken = []
+_taken_lock = threading.Lock()
+
+
+def _claim_slot():
+    """Reserve one of this minute's profiles, or return False if they are used up."""
+    now = time.monotonic()
+    with _taken_lock:
+        while _taken and now - _taken[0] >= 60:
+            _taken.pop(0)
+        if len(_taken) >= MAX_PER_MINUTE:
+            return False
+        _taken.append(now)
+        return True
+
+
+def should_profile(endpoint, headers):
+    """
+    Decide whether to profile a request.
+
+    Args:
+        endpoint (str): Flask endpoint name, or None if no route matched.
+        headers (Mapping): Request headers.
+
+    Returns:
+        bool: True if the request should be profiled and a slot was reserved.
+    """
+    if not ENABLED or endpoint is None or (ENDPOINTS and endpoint not in ENDPOINTS):
+        return False
+    if not headers.get(PROFILE_HEADER) and not (SAMPLE_RATE and random.random() < SAMPLE_RATE):
+        return False
+    return _claim_slot()
+
+
+def start_profile():
+    """
+    Start profiling the current thread.
+
+    Returns:
+        cProfile.Profile: The running profiler, or None if another request is being profiled.
+    """
+    if not _active.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool is active
+        _active.release()
+        return None
+    return profiler
+
+
+def finish_profile(profiler, details):
+    """
+    Stop a profiler started by ``start_profile`` and store its profile.
+
+    Args:
+        profiler (cProfile.Profile): The running profiler.
+        details (dict): Description of the request, stored with the profile.
+
+    Returns:
+        str: Name of the stored profile, or None if it could not be written.
+    """
+    profiler.disable()
+    _active.release()
+    created = datetime.now(timezone.utc)
+    name = f"{created:%Y%m%dT%H%M%S%f}-{os.getpid()}-{details.get('endpoint', 'request')}"
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name + _PROFILE_SUFFIX))
+        with open(os.path.join(PROFILE_DIR, name + _META_SUFFIX), "w") as f:
+            json.dump(dict(details, name=name, created_at=created.isoformat(), pid=os.getpid()), f)
+        prune_profiles()
+    except OSError as e:
+        logger.error("Could not store request profile %s: %s", name, e)
+        return None
+    logger.info("Stored request profile %s", name)
+    return name
+
+
+def list_profiles():
+    """
+    Describe the stored profiles.
+
+    Returns:
+        list: Profile descriptions, newest first.
+    """
+    profiles = []
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    for file_name in names:
+        if not file_name.endswith(_META_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, file_name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda profile: profile["name"], reverse=True)
+    return profiles
+
+
+def prune_profiles(keep=KEEP):
+    """Delete all but the newest ``keep`` profiles."""
+    for profile in list_profiles()[keep:]:
+        for suffix in (_PROFILE_SUFFIX, _META_SUFFIX):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile["name"] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(name):
+    """
+    Get the pstats file of a stored profile.
+
+    Args:
+        name (str): Profile name from ``list_profiles``.
+
+    Returns:
+        str: Path of the file, or None if there is no such profile.
+    """
+    if name not in {profile["name"] for profile in list_profiles()}:
+        return None
+    path = os.path.join(PROFILE_DIR, name + _PROFILE_SUFFIX)
+    return path if os.path.exists(path) else None
+
+
+def profile_text(path, sort="cumulative", limit=TEXT_LIMIT):
+    """
+    Render a stored profile as a pstats report.
+
+    Args:
+        path (str): Path from ``profile_path``.
+        sort (str): pstats sort key, such as ``cumulative`` or ``tottime``.
+        limit (int): Number of functions listed.
+
+    Returns:
+        str: The report.
+    """
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _start_request():
+    if should_profile(request.endpoint, request.headers):
+        g.request_profile_started = time.perf_counter()
+        g.request_profiler = start_profile()
+
+
+def _teardown_request(exc):
+    profiler = g.pop("request_profiler", None)
+    if profiler is not None:
+        finish_profile(profiler, {
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "duration_ms": round((time.perf_counter() - g.pop("request_profile_started")) * 1000, 3),
+            "error": repr(exc) if exc is not None else None,
+        })
+
+
+def init_app(app):
+    """
+    Profile sampled requests of a Flask app; does nothing unless ``REQUEST_PROFILING=1``.
+
+    Args:
+        app (Flask): The application.
+    """
+    if not ENABLED:
+        return
+    app.before_request(_start_request)
+    app.teardown_request(_teardown_request)
+    logger.info("Request profiling enabled, writing to %s", PROFILE_DIR)
@@ -0,0 +1,394 @@
+"""
+Declarative fuzzy rule base for MLBB Hero Selector.
+
+The inputs, membership functions, output and rules are data, read from
+``data/rule_base.json`` (or a TOML file with the same layout)::
+
+    {
+      "format": 1,
+      "inputs": {
+        "damage": {"universe": [0, 11, 1], "automf": ["low", "medium", "high"]},
+        "win_rate": {"universe": [40, 61, 1], "terms": {"low": {"trimf": [40, 45, 50]}}}
+      },
+      "output": {"name": "suitability", "universe": [0, 101, 1], "terms": {...}},
+      "rules": [
+        {"group": "tank", "if": "durability[high] & crowd_control[high]", "then": "high"},
+        {"group": "statistics", "if": "win_rate[high]", "then": "high", "enabled": false}
+      ]
+    }
+
+Universes are ``numpy.arange`` arguments. Terms are ``trimf`` or ``trapmf``
+shapes, or ``automf`` names spread evenly over the universe as scikit-fuzzy
+does. Rule conditions combine ``input[term]`` with ``&`` (min), ``|`` (max),
+``~`` (complement) and parentheses, and ``then`` names an output term, with an
+optional ``weight``.
+
+``compile_plan`` turns a spec into a ``RulePlan`` for ``BatchFuzzyEngine``:
+inputs no enabled rule reads are pruned, identical membership functions of an
+input share one column, shared subexpressions and duplicate rules are
+evaluated once, and ``fingerprint`` hashes what is left, so two specs that
+evaluate the same way share score caches.
+"""
+import os
+import re
+import json
+import hashlib
+import numpy as np
+
+SPEC_FORMAT = 1
+DEFAULT_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rule_base.json")
+
+_TOKEN = re.compile(r"\s*(?:(?P<term>(?P<input>[A-Za-z_]\w*)\s*\[\s*(?P<label>[A-Za-z_]\w*)\s*\])|(?P<op>[&|~()]))")
+
+
+def trimf(universe, abc):
+    """Triangular membership function, as ``skfuzzy.trimf``."""
+    a, b, c = abc
+    if not a <= b <= c:
+        raise ValueError(f"trimf needs a <= b <= c, got {list(abc)}")
+    y = np.zeros(len(universe))
+    if a != b:
+        rising = (a < universe) & (universe < b)
+        y[rising] = (universe[rising] - a) / float(b - a)
+    if b != c:
+        falling = (b < universe) & (universe < c)
+        y[falling] = (c - universe[falling]) / float(c - b)
+    y[universe == b] = 1
+    return y
+
+
+def trapmf(universe, abcd):
+    """Trapezoidal membership function, as ``skfuzzy.trapmf``."""
+    a, b, c, d = abcd
+    if not a <= b <= c <= d:
+        raise ValueError(f"trapmf needs a <= b <= c <= d, got {list(abcd)}")
+    y = np.ones(len(universe))
+    left = universe <= b
+    y[left] = trimf(universe[left], (a, b, b))
+    right = universe >= c
+    y[right] = trimf(universe[right], (c, c, d))
+    y[(universe < a) | (universe > d)] = 0
+    return y
+
+
+def automf(universe, names):
+    """
+    Spread triangular terms evenly over a universe, as ``FuzzyVariable.automf``.
+
+    Args:
+        universe (np.ndarray): Sampled universe.
+        names (list): Term names, lowest first.
+
+    Returns:
+        dict: Membership function per name.
+    """
+    number = len(names)
+    if number < 2:
+        raise ValueError("automf needs at least two names")
+    limits = [universe.min(), universe.max()]
+    width = (limits[1] - limits[0]) / ((number - 1) / 2.)
+    centers = np.linspace(limits[0], limits[1], number)
+    return {name: trimf(universe, [center - width / 2, center, center + width / 2])
+            for name, center in zip(names, centers)}
+
+
+MEMBERSHIP_FUNCTIONS = {"trimf": trimf, "trapmf": trapmf}
+
+
+def load_spec(path=DEFAULT_SPEC_PATH):
+    """
+    Read a rule spec file.
+
+    Args:
+        path (str): JSON file, or TOML if it ends in ``.toml``.
+
+    Returns:
+        dict: The spec.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it cannot be parsed.
+    """
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_condition(text):
+    """
+    Parse a rule condition into a tree.
+
+    Args:
+        text (str): Condition such as ``"damage[high] & ~mobility[low]"``.
+
+    Returns:
+        tuple: ``("term", input, term)``, ``("not", node)``, or
+        ``("and" | "or", left, right)``.
+
+    Raises:
+        ValueError: If the condition is malformed.
+    """
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected {text[position:].strip()!r} in condition {text!r}")
+        tokens.append(("term", match["input"], match["label"]) if match["term"] else match["op"])
+        position = match.end()
+    tokens.append(None)
+
+    def parse_or(i):
+        node, i = parse_and(i)
+        while tokens[i] == "|":
+            right, i = parse_and(i + 1)
+            node = ("or", node, right)
+        return node, i
+
+    def parse_and(i):
+        node, i = parse_unary(i)
+        while tokens[i] == "&":
+            right, i = parse_unary(i + 1)
+            node = ("and", node, right)
+        return node, i
+
+    def parse_unary(i):
+        token = tokens[i]
+        if token == "~":
+            node, i = parse_unary(i + 1)
+            return ("not", node), i
+        if token == "(":
+            node, i = parse_or(i + 1)
+            if tokens[i] != ")":
+                raise ValueError(f"Missing ')' in condition {text!r}")
+            return node, i + 1
+        if isinstance(token, tuple):
+            return token, i + 1
+        raise ValueError(f"Expected a term in condition {text!r}")
+
+    node, i = parse_or(0)
+    if tokens[i] is not None:
+        raise ValueError(f"Unexpected {tokens[i]!r} in condition {text!r}")
+    return node
+
+
+def _universe(name, definition):
+    try:
+        universe = np.arange(*definition["universe"])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"{name}: universe must be [start, stop, step]") from e
+    if universe.size < 2:
+        raise ValueError(f"{name}: universe needs at least two points")
+    return universe
+
+
+def _terms(name, definition, universe):
+    if "automf" in definition:
+        return automf(universe, list(definition["automf"]))
+    terms = {}
+    for label, shape in definition.get("terms", {}).items():
+        if not isinstance(shape, dict) or len(shape) != 1:
+            raise ValueError(f"{name}[{label}]: expected one of {sorted(MEMBERSHIP_FUNCTIONS)}")
+        (kind, params), = shape.items()
+        if kind not in MEMBERSHIP_FUNCTIONS:
+            raise ValueError(f"{name}[{label}]: unknown membership function {kind!r}")
+        terms[label] = MEMBERSHIP_FUNCTIONS[kind](universe, params)
+    return terms
+
+
+def _condition_terms(node):
+    if node[0] == "term":
+        yield node[1], node[2]
+    else:
+        for child in node[1:]:
+            yield from _condition_terms(child)
+
+
+class RulePlan:
+    """A rule spec compiled for vectorized evaluation."""
+
+    def __init__(self, spec):
+        """
+        Args:
+            spec (dict): Rule spec, as from ``load_spec``.
+
+        Raises:
+            ValueError: If the spec is invalid.
+        """
+        if spec.get("format") != SPEC_FORMAT:
+            raise ValueError(f"Unsupported rule spec format: {spec.get('format')}")
+        output = spec.get("output") or {}
+        self.output_label = output.get("name", "suitability")
+        self.output_universe = _universe(self.output_label, output)
+        output_terms = _terms(self.output_label, output, self.output_universe)
+        if not output_terms:
+            raise ValueError(f"{self.output_label}: no output terms")
+        self.output_terms = list(output_terms)
+        self.output_mfs = np.array([output_terms[label] for label in self.output_terms], dtype=np.float64)
+
+        declared = spec.get("inputs") or {}
+        enabled = [rule for rule in spec.get("rules") or [] if rule.get("enabled", True)]
+        self.disabled_rules = len(spec.get("rules") or []) - len(enabled)
+        conditions = []
+        compiled = []
+        for number, rule in enumerate(enabled, 1):
+            name = f"rule {number} ({rule.get('group', 'ungrouped')})"
+            if "if" not in rule or "then" not in rule:
+                raise ValueError(f"{name}: needs 'if' and 'then'")
+            if rule["then"] not in self.output_terms:
+                raise ValueError(f"{name}: unknown output term {rule['then']!r}")
+            try:
+                condition = parse_condition(rule["if"])
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}") from e
+            for input_label, term_label in _condition_terms(condition):
+                if input_label not in declared:
+                    raise ValueError(f"{name}: unknown input {input_label!r}")
+                conditions.append((input_label, term_label))
+            consequents = ((self.output_terms.index(rule["then"]), float(rule.get("weight", 1.0))),)
+            compiled.append((name, condition, consequents))
+
+        # Inputs no enabled rule reads are never fuzzified
+        self.inputs = sorted({input_label for input_label, _ in conditions})
+        self.pruned_inputs = sorted(set(declared) - set(self.inputs))
+        self.universes = []
+        self.input_terms = {}
+        for input_label in self.inputs:
+            universe = _universe(input_label, declared[input_label])
+            self.universes.append(universe)
+            self.input_terms[input_label] = _terms(input_label, declared[input_label], universe)
+
+        # Membership columns for the terms rules read; identical shapes on one input share a column
+        used = set(conditions)
+        self.term_sources = []
+        self._columns = {}
+        shapes = {}
+        for input_index, input_label in enumerate(self.inputs):
+            for term_label, mf in self.input_terms[input_label].items():
+                if (input_label, term_label) not in used:
+                    continue
+                shape = (input_index, np.asarray(mf, dtype=np.float64).tobytes())
+                if shape not in shapes:
+                    shapes[shape] = len(self.term_sources)
+                    self.term_sources.append((input_index, np.asarray(mf, dtype=np.float64)))
+                self._columns[(input_label, term_label)] = shapes[shape]
+        for name, condition, _ in compiled:
+            for input_label, term_label in _condition_terms(condition):
+                if (input_label, term_label) not in self._columns:
+                    raise ValueError(f"{name}: unknown term {input_label}[{term_label}]")
+
+        # Expression nodes in evaluation order, each distinct subexpression once
+        self.nodes = []
+        self._node_index = {}
+        merged = {}
+        for _, condition, consequents in compiled:
+            node = self._intern(condition)
+            merged.setdefault(node, set()).update(consequents)
+        self.rules = [(node, tuple(sorted(consequents))) for node, consequents in merged.items()]
+        self.rule_conditions = [(condition, consequents) for _, condition, consequents in compiled]
+        self.fingerprint = self._fingerprint()
+
+    def _intern(self, condition):
+        if condition[0] == "term":
+            key = ("term", self._columns[(condition[1], condition[2])])
+        elif condition[0] == "not":
+            key = ("not", self._intern(condition[1]))
+        else:
+            # min and max are commutative, so operand order does not matter
+            key = (condition[0],) + tuple(sorted((self._intern(condition[1]), self._intern(condition[2]))))
+        if key not in self._node_index:
+            self._node_index[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self._node_index[key]
+
+    def describe(self, node):
+        """Nested tuple describing a node independently of evaluation order."""
+        key = self.nodes[node]
+        if key[0] == "term":
+            input_index, mf = self.term_sources[key[1]]
+            return ("term", self.inputs[input_index], hashlib.sha256(mf.tobytes()).hexdigest())
+        children = sorted(repr(self.describe(child)) for child in key[1:])
+        return (key[0],) + tuple(children)
+
+    def _fingerprint(self):
+        digest = hashlib.sha256()
+        digest.update(repr(self.inputs).encode())
+        for universe in self.universes:
+            digest.update(np.asarray(universe, dtype=np.float64).tobytes())
+        digest.update(self.output_label.encode())
+        digest.update(np.asarray(self.output_universe, dtype=np.float64).tobytes())
+        digest.update(self.output_mfs.tobytes())
+        for rule in sorted(repr((self.describe(node), consequents)) for node, consequents in self.rules):
+            digest.update(rule.encode())
+        return digest.hexdigest()
+
+    def summary(self):
+        """One-line description for logs."""
+        return (f"{len(self.rule_conditions)} enabled rules ({self.disabled_rules} disabled) compiled to "
+                f"{len(self.rules)} rules over {len(self.nodes)} nodes, {len(self.inputs)} inputs "
+                f"({len(self.pruned_inputs)} pruned), {len(self.term_sources)} membership columns")
+
+
+def compile_plan(spec):
+    """
+    Compile a rule spec.
+
+    Args:
+        spec (dict): Rule spec, as from ``load_spec``.
+
+    Returns:
+        RulePlan: The plan.
+
+    Raises:
+        ValueError: If the spec is invalid.
+    """
+    try:
+        return RulePlan(spec)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid rule spec: {e!r}") from e
+
+
+def build_control_system(plan):
+    """
+    Build the scikit-fuzzy control system for a plan's enabled rules.
+
+    Used for reference inference; scoring itself runs on ``BatchFuzzyEngine``.
+
+    Args:
+        plan (RulePlan): Compiled plan.
+
+    Returns:
+        ctrl.ControlSystem: The rule base.
+    """
+    # scikit-fuzzy is slow to import, so it is only loaded once a control system is needed
+    from skfuzzy import control as ctrl
+
+    antecedents = {}
+    for input_label, universe in zip(plan.inputs, plan.universes):
+        antecedent = ctrl.Antecedent(universe, input_label)
+        for term_label, mf in plan.input_terms[input_label].items():
+            antecedent[term_label] = mf
+        antecedents[input_label] = antecedent
+    consequent = ctrl.Consequent(plan.output_universe, plan.output_label)
+    for term_label, mf in zip(plan.output_terms, plan.output_mfs):
+        consequent[term_label] = mf
+
+    def build(condition):
+        if condition[0] == "term":
+            return antecedents[condition[1]][condition[2]]
+        if condition[0] == "not":
+            return ~build(condition[1])
+        left, right = build(condition[1]), build(condition[2])
+        return left & right if condition[0] == "and" else left | right
+
+    rules = []
+    for condition, consequents in plan.rule_conditions:
+        terms = [consequent[plan.output_terms[index]] if weight == 1.0
+                 else consequent[plan.output_terms[index]] % weight
+                 for index, weight in consequents]
+        rules.append(ctrl.Rule(build(condition), terms))
+    return ctrl.ControlSystem(rules)
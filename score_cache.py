@@ -0,0 +1,201 @@
+"""
+Caches for hero scoring and the hero catalog in the MLBB hero recommendation system.
+
+Entries live in the backend chosen by ``CACHE_BACKEND`` (see
+``cache_backends``); with a shared backend every worker sees the same
+entries and the same invalidations.
+"""
+import os
+import hashlib
+from cache_backends import create_backend
+
+DEFAULT_SUITABILITY_CACHE_SIZE = 1024
+DEFAULT_RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 4096))
+
+# Seconds shared backends keep a response, since old catalog versions are never read again
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+
+
+class SuitabilityCache:
+    """Cache of hero suitability scores keyed by hero id, ``updated_at`` and rule base fingerprint."""
+
+    def __init__(self, backend=None, max_size=DEFAULT_SUITABILITY_CACHE_SIZE):
+        """
+        Args:
+            backend (optional): Storage backend; a new one from ``CACHE_BACKEND`` when omitted.
+            max_size (int): Size bound for a backend created here.
+        """
+        self._backend = backend or create_backend("suitability", max_size)
+
+    @staticmethod
+    def _key(hero_id):
+        return f"suitability:{hero_id}"
+
+    def get(self, hero, rule_base=None):
+        """
+        Get the cached suitability score of a hero.
+
+        Args:
+            hero (dict): The hero data.
+            rule_base (str, optional): Fingerprint of the rule base the score must come from.
+
+        Returns:
+            float: Cached score, or None if missing, the hero changed since,
+            or it was scored by another rule base.
+        """
+        return self.get_many([hero], rule_base)[0]
+
+    def get_many(self, heroes, rule_base=None):
+        """
+        Get the cached suitability scores of many heroes in one backend round trip.
+
+        Args:
+            heroes (list): Hero dictionaries.
+            rule_base (str, optional): Fingerprint of the rule base the scores must come from.
+
+        Returns:
+            list: Cached score per hero, None where missing or stale.
+        """
+        keys = [self._key(hero.get("id")) for hero in heroes]
+        entries = self._backend.get_many(keys)
+        scores = []
+        for hero, entry in zip(heroes, entries):
+            if (hero.get("id") is None or entry is None or entry[0] != hero.get("updated_at")
+                    or (entry[2] if len(entry) > 2 else None) != rule_base):
+                scores.append(None)
+            else:
+                scores.append(entry[1])
+        return scores
+
+    def set(self, hero, score, rule_base=None):
+        """
+        Cache the suitability score of a hero.
+
+        Args:
+            hero (dict): The hero data.
+            score (float): The hero's suitability score.
+            rule_base (str, optional): Fingerprint of the rule base that scored it.
+        """
+        self.set_many([hero], [score], rule_base)
+
+    def set_many(self, heroes, scores, rule_base=None):
+        """Cache the suitability scores of many heroes in one backend round trip."""
+        self._backend.set_many([(self._key(hero["id"]), [hero.get("updated_at"), float(score), rule_base])
+                                for hero, score in zip(heroes, scores) if hero.get("id") is not None])
+
+    def invalidate(self, hero_id):
+        """Drop the cached score of a hero after it was written."""
+        self._backend.delete(self._key(hero_id))
+
+    def clear(self):
+        """Drop every cached score."""
+        self._backend.clear()
+
+
+class ResponseCache:
+    """
+    Cache of evaluation payloads.
+
+    Keys combine what was evaluated (a hero ID or a role), the quantized
+    preference vector and the catalog tag, so a catalog write makes every
+    older entry unreachable; those entries then age out of the LRU, or expire
+    after ``RESPONSE_CACHE_TTL`` in a shared backend.
+    """
+
+    def __init__(self, backend=None, max_size=DEFAULT_RESPONSE_CACHE_SIZE):
+        """
+        Args:
+            backend (optional): Storage backend; a new one from ``CACHE_BACKEND`` when omitted.
+            max_size (int): Size bound for a backend created here.
+        """
+        self._backend = backend or create_backend("response", max_size)
+
+    @staticmethod
+    def make_key(kind, subject, preferences, catalog_tag, *extra):
+        """
+        Build a cache key.
+
+        Args:
+            kind (str): Endpoint family, e.g. ``"hero"`` or ``"role"``.
+            subject: Hero ID or role.
+            preferences (tuple): Quantized preference values in a fixed order.
+            catalog_tag (str): Tag of the catalog the payload is computed from.
+            *extra: Any other parameters the payload depends on.
+
+        Returns:
+            tuple: The key.
+        """
+        return (kind, str(subject), tuple(preferences), catalog_tag) + extra
+
+    @staticmethod
+    def etag(key):
+        """Strong entity tag for the payload stored under ``key``."""
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached payload for ``key``, or None."""
+        return self._backend.get(self.etag(key))
+
+    def set(self, key, payload):
+        """Cache ``payload`` under ``key``."""
+        self._backend.set(self.etag(key), payload, RESPONSE_CACHE_TTL)
+
+    def clear(self):
+        """Drop every cached payload."""
+        self._backend.clear()
+
+
+class CatalogCache:
+    """
+    Shared copy of the latest hero catalog snapshot.
+
+    Only one snapshot is kept, labelled with its catalog tag (version and
+    write time). The hero write paths delete it, and readers ignore a
+    snapshot whose tag does not match the database. With the in-process backend this cache stays
+    empty, because each process already keeps its own snapshot.
+    """
+
+    KEY = "catalog"
+
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend (optional): Storage backend; a new one from ``CACHE_BACKEND`` when omitted.
+        """
+        self._backend = backend or create_backend("catalog", 1)
+
+    def get(self, tag):
+        """
+        Get the cached snapshot of a catalog version.
+
+        Args:
+            tag (str): Catalog tag wanted, from ``hero_catalog.catalog_tag``.
+
+        Returns:
+            list: Hero dictionaries, or None if missing or of another version.
+        """
+        if not self._backend.shared:
+            return None
+        entry = self._backend.get(self.KEY)
+        if entry is None or entry["tag"] != tag:
+            return None
+        return entry["heroes"]
+
+    def set(self, tag, heroes):
+        """Share the snapshot of a catalog version."""
+        if self._backend.shared:
+            self._backend.set(self.KEY, {"tag": tag, "heroes": list(heroes)})
+
+    def invalidate(self):
+        """Drop the shared snapshot after a hero write."""
+        self._backend.delete(self.KEY)
+
+
+# Shared by the scoring code and the hero write paths
+suitability_cache = SuitabilityCache()
+
+# Shared by the evaluation endpoints
+response_cache = ResponseCache()
+
+# Shared by the catalog loader and the hero write paths
+catalog_cache = CatalogCache()
@@ -0,0 +1,145 @@
+"""
+Optional process-pool backend for hero suitability scoring.
+
+The pool is off unless ``SCORING_POOL_SIZE`` is set to 2 or more. Each worker
+compiles the rule base and loads the lookup table once when it starts, and
+rosters smaller than ``SCORING_POOL_MIN_HEROES`` stay in the calling process.
+Every shard carries the fingerprint of the caller's rule base, so a worker
+that has not yet picked up a reloaded spec never answers with stale scores.
+A pool belongs to the process that started it: a forked child starts its own
+on first use, since the inherited pool's manager thread did not survive the fork.
+"""
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("SCORING_POOL_SIZE", 0))
+SERIAL_CUTOFF = int(os.environ.get("SCORING_POOL_MIN_HEROES", 256))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    """Warm a worker by building everything scoring needs up front."""
+    import fuzzy_logic
+    fuzzy_logic.get_suitability_table()
+
+
+def _score_shard(values, rule_base=None):
+    """Score one shard of the input array inside a worker, or return None if its rule base differs."""
+    import fuzzy_logic
+    rules = fuzzy_logic.get_rule_base()
+    if rule_base is not None and rules.fingerprint != rule_base:
+        rules = fuzzy_logic.reload_rule_base(force=True)
+        if rules.fingerprint != rule_base:
+            return None
+    return fuzzy_logic.score_input_array(values, rules)
+
+
+def configure(pool_size=None, serial_cutoff=None):
+    """
+    Change the pool settings, shutting down a pool of the old size.
+
+    Args:
+        pool_size (int, optional): Number of worker processes; below 2 disables the pool.
+        serial_cutoff (int, optional): Rosters smaller than this are scored serially.
+    """
+    global POOL_SIZE, SERIAL_CUTOFF
+    if pool_size is not None and pool_size != POOL_SIZE:
+        shutdown()
+        POOL_SIZE = pool_size
+    if serial_cutoff is not None:
+        SERIAL_CUTOFF = serial_cutoff
+
+
+def get_executor():
+    """
+    Get the worker pool, starting it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The pool, or None if it is disabled.
+    """
+    global _executor, _executor_pid
+    if POOL_SIZE < 2:
+        return None
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                # Spawned workers do not inherit database connections or locks
+                _executor = ProcessPoolExecutor(max_workers=POOL_SIZE,
+                                                mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_init_worker)
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def shutdown(wait=False):
+    """
+    Stop the worker pool if this process started it, and forget it either way.
+
+    Args:
+        wait (bool): Block until the worker processes have exited.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
+        _executor_pid = None
+
+
+def _forget_inherited_pool():
+    """Drop the parent's pool in a forked child without stopping it for the parent."""
+    global _executor, _executor_pid, _executor_lock
+    # The parent's lock may have been held by another thread at fork time
+    _executor_lock = threading.Lock()
+    _executor = None
+    _executor_pid = None
+
+
+def map_scores(values, rule_base=None):
+    """
+    Score an input array across the pool, preserving row order.
+
+    Args:
+        values (np.ndarray): Array of shape (N, number of control inputs).
+        rule_base (str, optional): Fingerprint of the rule base to score with.
+
+    Returns:
+        np.ndarray: Scores in row order, or None if the caller should score
+        serially (pool disabled, roster below the cutoff, pool failure, or a
+        worker on another rule base).
+    """
+    if len(values) < SERIAL_CUTOFF:
+        return None
+    executor = get_executor()
+    if executor is None:
+        return None
+
+    # Contiguous shards, one per worker, reassembled in submission order
+    shards = [shard for shard in np.array_split(values, POOL_SIZE) if len(shard)]
+    try:
+        results = list(executor.map(_score_shard, shards, [rule_base] * len(shards)))
+    except BrokenProcessPool as e:
+        logger.error("Scoring pool failed, falling back to serial scoring: %s", e)
+        shutdown()
+        return None
+    if any(result is None for result in results):
+        logger.warning("Scoring pool is on another rule base than %s, scoring serially", (rule_base or "")[:12])
+        return None
+    return np.concatenate(results)
+
+
+atexit.register(shutdown)
+
+# Submitting to an inherited pool never completes, since nothing drives its queues
+os.register_at_fork(after_in_child=_forget_inherited_pool)
@@ -38,7 +38,7 @@ function filterHeroesByRole(role) {
     
     // If we have an API endpoint
     if (role) {
-        fetch(`/api/heroes?role=${role}`)
+        fetch(`/api/heroes?role=${encodeURIComponent(role)}&fields=summary`)
             .then(response => response.json())
             .then(heroes => {
                 // Clear existing options
@@ -0,0 +1,183 @@
+"""
+Precomputed suitability lookup table for the MLBB hero recommendation system.
+
+For inputs that sit on the sampled universes of the control system every
+membership degree comes from a small set of levels, and min/max rule firing
+keeps the output cuts on those levels. The crisp suitability therefore only
+depends on the level each output term is cut at, and the table stores the
+defuzzified score for every combination. Build it offline with::
+
+    python suitability_table.py [path]
+"""
+import itertools
+import json
+import logging
+import os
+import sys
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TABLE_FORMAT = 1
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "suitability_table.json")
+
+# Inputs and cuts closer than this to a grid point are treated as on the grid
+GRID_TOLERANCE = 1e-9
+
+
+def _nearest(grid, values):
+    """Return the index of the nearest grid point and whether it is a match."""
+    if grid.size == 1:
+        index = np.zeros(values.shape, dtype=np.intp)
+    else:
+        index = np.clip(np.searchsorted(grid, values), 1, grid.size - 1)
+        index = np.where(np.abs(grid[index - 1] - values) <= np.abs(grid[index] - values), index - 1, index)
+    return index, np.abs(grid[index] - values) <= GRID_TOLERANCE
+
+
+class SuitabilityTable:
+    """Defuzzified suitability for every combination of output cut levels."""
+
+    def __init__(self, engine, levels, values, rule_base):
+        """
+        Args:
+            engine (BatchFuzzyEngine): Engine the table was built from.
+            levels (array-like): Sorted membership levels.
+            values (array-like): Scores with one axis per active output term.
+            rule_base (str): Fingerprint of the engine's rule base.
+        """
+        self.engine = engine
+        self.levels = np.asarray(levels, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.rule_base = rule_base
+        self._outputs = engine.active_outputs
+
+    @classmethod
+    def build(cls, engine):
+        """
+        Build the table by defuzzifying every combination of cut levels.
+
+        Args:
+            engine (BatchFuzzyEngine): The compiled rule base.
+
+        Returns:
+            SuitabilityTable: The freshly built table.
+        """
+        levels = engine.membership_levels()
+        outputs = engine.active_outputs
+        combos = np.array(list(itertools.product(range(levels.size), repeat=len(outputs))))
+        cuts = np.zeros((len(combos), len(engine.output_terms)))
+        cuts[:, outputs] = levels[combos]
+        values = engine.defuzzify(cuts).reshape((levels.size,) * len(outputs))
+        return cls(engine, levels, values, engine.fingerprint())
+
+    @classmethod
+    def load(cls, path, engine):
+        """
+        Load a table from disk and check it against the current rule base.
+
+        Args:
+            path (str): Path to the JSON table.
+            engine (BatchFuzzyEngine): The compiled rule base.
+
+        Returns:
+            SuitabilityTable: The loaded table.
+
+        Raises:
+            ValueError: If the file was built for another format or rule base.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("format") != TABLE_FORMAT:
+            raise ValueError(f"Unsupported suitability table format: {data.get('format')}")
+        if data.get("rule_base") != engine.fingerprint():
+            raise ValueError("Suitability table was built for a different rule base")
+        values = np.array([np.nan if v is None else v for v in data["values"]], dtype=np.float64)
+        return cls(engine, data["levels"], values.reshape(data["shape"]), data["rule_base"])
+
+    def save(self, path):
+        """
+        Write the table to disk as JSON.
+
+        Args:
+            path (str): Destination path.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "format": TABLE_FORMAT,
+            "rule_base": self.rule_base,
+            "inputs": self.engine.inputs,
+            "output_terms": [self.engine.output_terms[i] for i in self._outputs],
+            "levels": self.levels.tolist(),
+            "shape": list(self.values.shape),
+            "values": [None if np.isnan(v) else round(float(v), 10) for v in self.values.ravel()]
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    def _grid_indices(self, values):
+        """Map inputs to universe positions and flag the rows that sit on the grid."""
+        values = np.asarray(values, dtype=np.float64)
+        hits = np.ones(values.shape[0], dtype=bool)
+        indices = np.empty(values.shape, dtype=np.intp)
+
+        # Out-of-range inputs are clipped exactly as live inference does
+        for column, universe in enumerate(self.engine.universes):
+            crisp = np.clip(values[:, column], universe[0], universe[-1])
+            indices[:, column], matched = _nearest(universe, crisp)
+            hits &= matched
+        return indices, hits
+
+    def lookup(self, values):
+        """
+        Look up suitability scores for a batch of crisp inputs.
+
+        Args:
+            values (np.ndarray): Array of shape (N, len(engine.inputs)).
+
+        Returns:
+            tuple: (scores, hits). ``scores`` holds the table value where
+            ``hits`` is True and NaN elsewhere; rows that miss need live
+            inference.
+        """
+        indices, hits = self._grid_indices(values)
+        cuts = self.engine.fire(self.engine.sample_memberships(indices))[:, self._outputs]
+        level_indices, matched = _nearest(self.levels, cuts)
+        hits &= matched.all(axis=1)
+
+        scores = np.full(hits.size, np.nan)
+        scores[hits] = self.values[tuple(level_indices[hits].T)]
+        return scores, hits
+
+
+def load_suitability_table(engine, path=DEFAULT_TABLE_PATH):
+    """
+    Load the on-disk table, rebuilding it in memory if it is missing or stale.
+
+    Args:
+        engine (BatchFuzzyEngine): The compiled rule base.
+        path (str): Path to the JSON table.
+
+    Returns:
+        SuitabilityTable: A table matching the current rule base.
+    """
+    try:
+        return SuitabilityTable.load(path, engine)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Rebuilding suitability table in memory: %s", e)
+        return SuitabilityTable.build(engine)
+
+
+def main(argv):
+    """Build the table from the current rule base and write it to disk."""
+    from fuzzy_logic import get_batch_engine
+
+    path = argv[1] if len(argv) > 1 else DEFAULT_TABLE_PATH
+    table = SuitabilityTable.build(get_batch_engine())
+    table.save(path)
+    print(f"Wrote {table.values.size} entries for rule base {table.rule_base[:12]} to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))